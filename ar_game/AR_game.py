@@ -1,19 +1,35 @@
 # Main entry point for AR game
 import enum
 import click
-import cv2
 import pyglet
 from pyglet.window import Window
 from pyglet.graphics import Batch
+from pyglet.math import Mat4, Vec3
 from src.game_manager import GameManager
 from src.frame_transformer import FrameTransformer
-from src.marker_detection import MarkerDetection
+from src.marker_detection import MarkerDetection, SharedMarkerDetection
 from src.camera import Camera
+from src.frame_pool import FramePool, PooledBuffer
+from src.frame_source import CapturedFrame, FrameSource
+from src.gray_pyramid import PixelFormat
+from src.replay_source import ReplaySource, ReplayMode
 from src.config import Config
 from src.perspective_transformer import PerspectiveTransformer
 from src.object_detection import ObjectDetection
+from src.fingertip_tracker import Fingertip
+from src.fingertip_motion import FingertipMotion
+from src.resolution_plan import ResolutionPlan
+from src.board_renderer import ProjectiveBoardRenderer
+from src.fingertip_backend import BACKENDS
+from src.detector_profile import DetectorProfile
+from src.performance_preset import PRESETS, PerformanceBenchmark
 import threading
 import queue
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+import cv2
+import numpy as np
 
 
 class GameState(enum.Enum):
@@ -22,43 +38,113 @@ class GameState(enum.Enum):
     RESUMING = "Starting in {:.1f} seconds..."
 
 
-class GameWindow(Window):
+class BoardResult:
+    """Output of the processing thread for a single board, owns the board buffer until `release` is called."""
+
+    def __init__(
+        self,
+        board_buffer: Optional[PooledBuffer] = None,
+        fingertips: Optional[List[Fingertip]] = None,
+        inner_corners: Optional[np.ndarray] = None,
+        board_matrix: Optional[np.ndarray] = None,
+        timestamp: float = 0.0,
+    ):
+        self.board_buffer = board_buffer
+        self.fingertips = fingertips or []
+        self.inner_corners = inner_corners
+        # Homography from capture pixels to the (mirrored) board at display resolution
+        self.board_matrix = board_matrix
+        # Monotonic capture time of the frame the fingertips were detected in
+        self.timestamp = timestamp
+
+    @property
+    def visible(self) -> bool:
+        return self.board_matrix is not None
+
+    def release(self):
+        if self.board_buffer is not None:
+            self.board_buffer.release()
+
+
+class ProcessingResult:
+    """Output of the processing thread for a single frame, owns the referenced buffers until `release` is called."""
+
+    def __init__(
+        self,
+        captured_frame: CapturedFrame,
+        color_buffer: Optional[PooledBuffer] = None,
+        boards: Optional[List[BoardResult]] = None,
+    ):
+        self.captured_frame = captured_frame
+        self.color_buffer = color_buffer
+        self.boards = boards or []
+
+    @property
+    def camera_image(self) -> np.ndarray:
+        """BGR camera frame for display."""
+        return self.color_buffer.array if self.color_buffer is not None else self.captured_frame.image
+
+    def release(self):
+        self.captured_frame.release()
+        if self.color_buffer is not None:
+            self.color_buffer.release()
+        for board in self.boards:
+            board.release()
+
+
+class BoardSession:
+    """A single player's board: marker tracking, warps, fingertip detection, game and drawing.
+
+    `process` runs on the processing thread (concurrently with the other boards), everything else on the main
+    thread. The game is simulated in display coordinates and drawn into the session's part of the window.
+    """
+
     game_state: GameState = GameState.SEARCHING_AREA
     resume_time: float = 0.0
 
     def __init__(
         self,
-        video_id: int,
-        camera_width: int,
-        camera_height: int,
-        board_ids=None,        
+        board_ids: List[int],
+        resolution_plan: ResolutionPlan,
+        camera_texture: pyglet.image.Texture,
+        shared_detection: Optional[SharedMarkerDetection] = None,
+        board_renderer: Optional[ProjectiveBoardRenderer] = None,
+        view: Mat4 = Mat4(),
     ):
-        super().__init__(Config.WINDOW_WIDTH, Config.WINDOW_HEIGHT, "Frucht NinjAR")
-        self.camera = Camera(video_id=video_id, resolution=(camera_width, camera_height))
-        self.marker_detection = MarkerDetection(self, board_ids)
-        self.object_detection = ObjectDetection()
+        self.resolution_plan = resolution_plan
+        self.view = view
+        # With a board renderer the board is drawn straight from the camera texture, otherwise it is warped on the CPU
+        self.camera_texture = camera_texture
+        self.board_renderer = board_renderer
+        self.board_matrix: Optional[np.ndarray] = None
+        self.marker_detection = MarkerDetection(
+            board_ids, resolution_plan=resolution_plan, shared_detection=shared_detection
+        )
+        self.object_detection = ObjectDetection(resolution_plan)
+        # Whether the last processed frame had a board, owned by the processing thread
+        self._board_found = False
+        # Predicts the fingertips from the capture time of the last result to the time they are drawn
+        self.fingertip_motion = FingertipMotion() if Config.FINGERTIP_MOTION_MODEL else None
+
+        # Preallocated buffers, the processing thread owns the fingertip frame, board frames are handed to the main thread
+        display_width, display_height = resolution_plan.display_size
+        self.board_pool = FramePool((display_height, display_width, 3), size=3)
+        fingertip_width, fingertip_height = resolution_plan.fingertip_size
+        # Colour backends detect on BGR frames, all others on luma
+        fingertip_channels = (3,) if self.object_detection.backend.needs_color else ()
+        self.fingertip_frame = np.empty((fingertip_height, fingertip_width, *fingertip_channels), dtype=np.uint8)
+        # Downscaled colour camera frame for colour backends in camera space, allocated on first use
+        self.fingertip_camera_frame: Optional[np.ndarray] = None
+        # One transformer per output size, both keep their homography and remap tables while the board is static
+        self.board_transformer = PerspectiveTransformer(flip=True)
+        self.fingertip_transformer = PerspectiveTransformer(flip=True)
 
         # Init graphics stuff
         self.game_batch = Batch()
-        self.ui_batch = Batch()
         self.game_state_batch = Batch()
-
         self.game_manager = GameManager(self.game_batch)
-
-        # ! Background drawn manually, not included in batch
-        self.background = pyglet.shapes.Rectangle(
-            0,
-            0,
-            Config.WINDOW_WIDTH,
-            Config.WINDOW_HEIGHT,
-            color=(255, 255, 255),
-        )
-        # Create a persistent texture and sprite for the video frame
-        self.frame_texture = pyglet.image.Texture.create(
-            width=Config.WINDOW_WIDTH,
-            height=Config.WINDOW_HEIGHT,
-        )
-        self.frame = pyglet.sprite.Sprite(self.frame_texture)
+        self.board_texture = pyglet.image.Texture.create(width=display_width, height=display_height)
+        self.board_frame = pyglet.sprite.Sprite(FrameTransformer.flipped_region(self.board_texture))
 
         # ! State label drawn manually, not included in batch
         self.game_state_label = pyglet.text.Label(
@@ -83,76 +169,100 @@ class GameWindow(Window):
         self.game_state_background.anchor_x = self.game_state_background.width // 2
         self.game_state_background.anchor_y = 0
 
-        # Multithreading setup for frame processing
-        self.frame_queue = queue.Queue(maxsize=1)
-        self.result_queue = queue.Queue(maxsize=1)
-        self.processing_thread = threading.Thread(target=self.processing_loop, daemon=True)
-        self.last_processed_result = (None, None, None, None, None)
-        self.processing_thread.start()
-        pyglet.clock.schedule_interval(self.update, 1.0 / Config.UPDATE_RATE)
-        pyglet.app.run()
+        self.last_processed_result = None
 
-    def processing_loop(self):
-        while True:
-            try:
-                frame = self.frame_queue.get(timeout=1)
-            except queue.Empty:
-                continue
-            # Downscale frame for processing
-            h, w = frame.shape[:2]
-            new_w, new_h = int(w * Config.PROCESSING_SCALE), int(h * Config.PROCESSING_SCALE)
-            small_frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
-            # Marker detection and perspective transform on downscaled frame
-            inner_corners, _ = self.marker_detection.get_board_data(small_frame)
-            perspective_transformed_frame = None
-            high, low = None, None
-            if inner_corners is not None:
-                # Scale corners back up to original size for correct perspective
-                scaled_corners = inner_corners / Config.PROCESSING_SCALE
-                perspective_transformed_frame = PerspectiveTransformer.transform(frame, scaled_corners)
-                if perspective_transformed_frame is not None:
-                    perspective_transformed_frame = cv2.flip(perspective_transformed_frame, 1)
-                    high, low = self.object_detection.detect_object(perspective_transformed_frame)
-            # Put results in result_queue
-            try:
-                self.result_queue.put((frame, perspective_transformed_frame, high, low, inner_corners), timeout=0.1)
-            except queue.Full:
-                pass
+    def process(self, captured_frame: CapturedFrame, camera_image: np.ndarray, marker_frame: np.ndarray) -> BoardResult:
+        """Track the board in a frame, warp it if it is not drawn by the shader and detect the fingertip on it."""
+        result = BoardResult(timestamp=captured_frame.timestamp)
+        marker_size = (marker_frame.shape[1], marker_frame.shape[0])
+        result.inner_corners, _ = self.marker_detection.get_board_data(marker_frame, captured_frame.timestamp)
+        if result.inner_corners is None:
+            self._board_found = False
+            return result
 
-    def is_full_board_visible(self) -> bool:
-        return self.game_state != GameState.SEARCHING_AREA
+        # Scale corners back up to capture size, every consumer warps straight from the captured frame
+        # The horizontal mirror is folded into the warp
+        scaled_corners = self.resolution_plan.marker_to_capture(result.inner_corners, marker_size)
+        board_buffer = None
+        if self.board_renderer is not None:
+            # The board is drawn from the camera texture, only its homography is needed
+            board_matrix = self.board_transformer.update(scaled_corners, self.resolution_plan.display_size)
+        else:
+            board_buffer = self.board_pool.acquire(timeout=0.1)
+            if board_buffer is None:
+                return result
+            board_matrix = (
+                self.board_transformer.matrix
+                if self.board_transformer.warp(camera_image, scaled_corners, board_buffer.array) is not None
+                else None
+            )
+        overlay = board_buffer.array if board_buffer is not None else None
 
-    def update(self, dt: float):
-        frame = self.camera.get_frame()
-        if frame is not None:
-            # Send frame to processing thread
-            try:
-                self.frame_queue.put(frame, timeout=0.01)
-            except queue.Full:
-                pass
-        # Get latest processed result, or reuse last
-        try:
-            result = self.result_queue.get_nowait()
-            self.last_processed_result = result
-        except queue.Empty:
-            result = self.last_processed_result
-        frame, perspective_transformed_frame, high, low, inner_corners = result
+        # A board that was found again may lie on another surface or under other light, learn its background from
+        # scratch. Learning continues with full weight through the countdown.
+        if board_matrix is not None and not self._board_found:
+            self.object_detection.reset_background()
+        self._board_found = board_matrix is not None
+        learn_background = self.game_state == GameState.RESUMING
+        if board_matrix is not None and Config.CAMERA_SPACE_FINGERTIP:
+            # Detect in the downscaled camera frame and only map the contour points onto the board
+            if self.object_detection.backend.needs_color:
+                width, height = self.resolution_plan.fingertip_camera_size
+                if self.fingertip_camera_frame is None or self.fingertip_camera_frame.shape[:2] != (height, width):
+                    self.fingertip_camera_frame = np.empty((height, width, 3), dtype=np.uint8)
+                camera_frame = cv2.resize(
+                    camera_image, (width, height), dst=self.fingertip_camera_frame, interpolation=cv2.INTER_AREA
+                )
+            else:
+                camera_frame = captured_frame.pyramid.at_size(self.resolution_plan.fingertip_camera_size)
+            result.board_matrix = board_matrix
+            result.fingertips = self.object_detection.detect_object_in_camera(
+                camera_frame, board_matrix, overlay, learn_background
+            )
+        elif (
+            board_matrix is not None
+            and self.fingertip_transformer.warp(
+                camera_image if self.object_detection.backend.needs_color else captured_frame.pyramid.base(),
+                scaled_corners,
+                self.fingertip_frame,
+            )
+            is not None
+        ):
+            result.board_matrix = board_matrix
+            result.fingertips = self.object_detection.detect_object(
+                self.fingertip_frame, overlay, learn_background
+            )
 
-        if frame is None:
+        if result.board_matrix is not None:
+            result.board_buffer = board_buffer
+        elif board_buffer is not None:
+            board_buffer.release()
+        return result
+
+    def upload(self, result: BoardResult):
+        """Upload the board image of a new result, the caller releases the result afterwards."""
+        if result.board_buffer is not None:
+            self.board_texture.blit_into(FrameTransformer.cv2_to_pyglet(result.board_buffer.array), 0, 0, 0)
+        self.board_matrix = result.board_matrix
+        self.last_processed_result = (result.visible, result.fingertips, result.inner_corners)
+        if self.fingertip_motion is not None:
+            self.fingertip_motion.update(result.fingertips, result.timestamp, time.monotonic())
+
+    def update(self, dt: float):
+        # Reuse the last result until a new one arrives
+        if self.last_processed_result is None:
             return
-        image_data = FrameTransformer.cv2_to_pyglet(
-            perspective_transformed_frame if perspective_transformed_frame is not None else frame
-        )
-        self.frame_texture.blit_into(image_data, 0, 0, 0)
+        board_visible, fingertips, inner_corners = self.last_processed_result
 
         # Adjust game state
-        desired_game_state = (
-            GameState.RUNNING if perspective_transformed_frame is not None else GameState.SEARCHING_AREA
-        )
+        desired_game_state = GameState.RUNNING if board_visible else GameState.SEARCHING_AREA
         self.update_game_state(dt, desired_game_state)
 
         if self.game_state == GameState.RUNNING:
-            self.game_manager.update(dt, high, low)
+            if self.fingertip_motion is not None:
+                # Results arrive slower than the game updates, sample the fingertips at the current time
+                fingertips = self.fingertip_motion.sample(time.monotonic())
+            self.game_manager.update(dt, fingertips)
 
     def update_game_state(self, dt: float, new_game_state: GameState):
         # Update game state based on whether we can see the board
@@ -179,16 +289,24 @@ class GameWindow(Window):
             self.game_state = GameState.SEARCHING_AREA
             self.resume_time = Config.RESUME_DURATION
 
-    def on_draw(self):
-        self.clear()
+    def is_full_board_visible(self) -> bool:
+        return self.game_state != GameState.SEARCHING_AREA
 
+    def draw(self, background: pyglet.shapes.Rectangle, camera_frame: pyglet.sprite.Sprite):
+        """Draw into the current view, the background and camera frame are shared by all boards."""
         # Draw background and frame
-        if self.game_state != GameState.SEARCHING_AREA:
-            self.background.draw()
-            self.frame.opacity = int(255 * 0.3)
+        if self.game_state == GameState.SEARCHING_AREA:
+            camera_frame.opacity = 255
+            camera_frame.draw()
         else:
-            self.frame.opacity = 255
-        self.frame.draw()
+            background.draw()
+            if self.board_renderer is not None and self.board_matrix is not None:
+                self.board_renderer.draw(
+                    self.camera_texture, self.board_matrix, self.resolution_plan.capture_size, int(255 * 0.3)
+                )
+            else:
+                self.board_frame.opacity = int(255 * 0.3)
+                self.board_frame.draw()
 
         # Draw game state label or the batch depending on the current game state
         # Update label text based on game state
@@ -202,8 +320,195 @@ class GameWindow(Window):
         if self.game_state != GameState.SEARCHING_AREA:
             self.game_batch.draw()
 
+
+class GameWindow(Window):
+    def __init__(
+        self,
+        video_id: int,
+        camera_width: int,
+        camera_height: int,
+        boards: List[List[int]],
+        source: Optional[str] = None,
+        replay_mode: str = ReplayMode.PACED,
+        yuyv: bool = False,
+    ):
+        super().__init__(Config.WINDOW_WIDTH, Config.WINDOW_HEIGHT, "Frucht NinjAR")
+        self.resolution_plan = ResolutionPlan.from_config((camera_width, camera_height))
+        self.frame_source: FrameSource = (
+            ReplaySource(source, replay_mode, threaded=True)
+            if source is not None
+            else Camera(video_id=video_id, resolution=self.resolution_plan.capture_size, threaded=True, yuyv=yuyv)
+        )
+        self.resolution_plan.set_capture_size(*self.frame_source.get_dimensions())
+        if Config.DEBUG:
+            print(self.resolution_plan)
+
+        # ! Background and camera frame drawn manually, shared by all boards
+        self.background = pyglet.shapes.Rectangle(
+            0,
+            0,
+            Config.WINDOW_WIDTH,
+            Config.WINDOW_HEIGHT,
+            color=(255, 255, 255),
+        )
+        # The raw frame is uploaded at capture resolution and scaled to the window on the GPU
+        capture_width, capture_height = self.resolution_plan.capture_size
+        self.camera_texture = pyglet.image.Texture.create(width=capture_width, height=capture_height)
+        self.camera_frame = pyglet.sprite.Sprite(FrameTransformer.flipped_region(self.camera_texture))
+        self.camera_frame.scale_x = Config.WINDOW_WIDTH / capture_width
+        self.camera_frame.scale_y = Config.WINDOW_HEIGHT / capture_height
+
+        # Every board is a separate game drawn side by side, several boards share one marker detection per frame
+        shared_detection = (
+            SharedMarkerDetection(boards, resolution_plan=self.resolution_plan) if len(boards) > 1 else None
+        )
+        # The debug overlay is drawn into the CPU warped board, so debug mode keeps the CPU warp
+        self.board_renderer = (
+            ProjectiveBoardRenderer(self.resolution_plan.display_size)
+            if Config.GPU_BOARD_WARP and not Config.DEBUG
+            else None
+        )
+        self.boards = [
+            BoardSession(
+                board_ids,
+                self.resolution_plan,
+                self.camera_texture,
+                shared_detection,
+                self.board_renderer,
+                self._board_view(index, len(boards)),
+            )
+            for index, board_ids in enumerate(boards)
+        ]
+        self.marker_detection = self.boards[0].marker_detection
+        self.board_executor = ThreadPoolExecutor(max_workers=len(boards)) if len(boards) > 1 else None
+
+        # ! Debug label drawn manually, only in debug mode
+        self.debug_label = pyglet.text.Label(
+            "",
+            font_name="Arial",
+            font_size=int(16 * Config.get_text_scale()),
+            x=10,
+            y=10,
+            color=(255, 0, 0, 255),
+            anchor_x="left",
+            anchor_y="bottom",
+        )
+
+        # Colour frames are only needed for sources that do not deliver BGR (e.g. raw YUYV)
+        self.color_pool = FramePool((capture_height, capture_width, 3), size=3)
+
+        # Multithreading setup for frame processing, frames are pulled from the frame source's latest-frame slot
+        self.result_queue = queue.Queue(maxsize=1)
+        self.processing_thread = threading.Thread(target=self.processing_loop, daemon=True)
+        self.processing_thread.start()
+        pyglet.clock.schedule_interval(self.update, 1.0 / Config.UPDATE_RATE)
+        pyglet.app.run()
+
+    @staticmethod
+    def _board_view(index: int, count: int) -> Mat4:
+        """View that draws a board's full-window game into its column of the window."""
+        scale = 1 / count
+        offset_y = Config.WINDOW_HEIGHT * (1 - scale) / 2
+        return Mat4.from_translation(Vec3(Config.WINDOW_WIDTH * scale * index, offset_y, 0)) @ Mat4.from_scale(
+            Vec3(scale, scale, 1)
+        )
+
+    def processing_loop(self):
+        last_sequence = 0
+        processed_frames = 0
+        start_time = None
+        while True:
+            captured_frame = self.frame_source.wait_for_frame(last_sequence, timeout=1)
+            if captured_frame is None:
+                if self.frame_source.finished and processed_frames > 0:
+                    # Report throughput once a replay is exhausted
+                    elapsed = time.perf_counter() - start_time
+                    print(
+                        f"Processed {processed_frames} frames in {elapsed:.2f}s ({processed_frames / elapsed:.1f} fps)"
+                    )
+                    processed_frames = 0
+                continue
+            if start_time is None:
+                start_time = time.perf_counter()
+            processed_frames += 1
+            last_sequence = captured_frame.sequence
+            # The captured frame is shared read-only, all drawing happens on buffers owned by this thread
+            result = ProcessingResult(captured_frame)
+            # Colour is only needed on the display branch
+            if captured_frame.pixel_format != PixelFormat.BGR:
+                result.color_buffer = self.color_pool.acquire(timeout=0.1)
+                if result.color_buffer is None:
+                    result.release()
+                    continue
+                captured_frame.to_bgr(result.color_buffer.array)
+            # Marker detection on the downscaled luma level
+            # The marker size may change after each detection (auto scaling), all boards use the size of this frame
+            marker_frame = captured_frame.pyramid.at_size(self.resolution_plan.marker_size)
+            if self.board_executor is None:
+                result.boards = [self.boards[0].process(captured_frame, result.camera_image, marker_frame)]
+            else:
+                # Per-board work runs concurrently, OpenCV releases the GIL
+                futures = [
+                    self.board_executor.submit(board.process, captured_frame, result.camera_image, marker_frame)
+                    for board in self.boards
+                ]
+                result.boards = [future.result() for future in futures]
+            # Hand the result over to the main thread, replacing a result it did not pick up yet
+            self._publish_result(result)
+
+    def _publish_result(self, result: ProcessingResult):
+        """Put a result into the result queue, releasing the buffers of a result that is replaced."""
+        try:
+            self.result_queue.get_nowait().release()
+        except queue.Empty:
+            pass
+        self.result_queue.put(result)
+
+    def is_full_board_visible(self) -> bool:
+        return any(board.is_full_board_visible() for board in self.boards)
+
+    def update(self, dt: float):
+        # Upload the latest processed result once, then return its buffers to their pools
+        try:
+            result = self.result_queue.get_nowait()
+        except queue.Empty:
+            result = None
+        if result is not None:
+            for board, board_result in zip(self.boards, result.boards):
+                board.upload(board_result)
+            # The camera frame is shown while searching and is the source of the GPU drawn board
+            if self.board_renderer is not None or not all(board_result.visible for board_result in result.boards):
+                self.camera_texture.blit_into(FrameTransformer.cv2_to_pyglet(result.camera_image), 0, 0, 0)
+            result.release()
+
+        for board in self.boards:
+            board.update(dt)
+
+    def on_draw(self):
+        self.clear()
+
+        for board in self.boards:
+            self.view = board.view
+            board.draw(self.background, self.camera_frame)
+        self.view = Mat4()
+
+        if Config.DEBUG:
+            self.debug_label.text = self.get_debug_text()
+            self.debug_label.draw()
+
+    def get_debug_text(self) -> str:
+        """Current state of the self-tuning pipeline stages."""
+        marker_size = self.resolution_plan.marker_size
+        thresholds = ", ".join(board.object_detection.get_threshold_text() for board in self.boards)
+        return (
+            f"Marker detection: {self.marker_detection.get_current_scale():.2f}x ({marker_size[0]}x{marker_size[1]})"
+            f" | Hand threshold: {thresholds}"
+        )
+
     def on_close(self):
-        self.camera.release()
+        if self.board_executor is not None:
+            self.board_executor.shutdown(wait=False)
+        self.frame_source.release()
         pyglet.app.exit()
 
 
@@ -213,26 +518,141 @@ class GameWindow(Window):
 @click.option("--height", show_default=True, default=720, type=int, help="Height of the application window")
 @click.option("--camera-width", show_default=True, default=640, type=int, help="Width of the camera feed (Performance intensive)")
 @click.option("--camera-height", show_default=True, default=480, type=int, help="Height of the camera feed (Performance intensive)")
+@click.option(
+    "--preset",
+    default="auto",
+    show_default=True,
+    type=click.Choice(["auto", "off", *PRESETS.keys()]),
+    help="Performance preset, auto benchmarks this machine once and caches the result",
+)
+@click.option(
+    "--detector-profile",
+    default=Config.DETECTOR_PROFILE,
+    show_default=True,
+    type=click.Choice(DetectorProfile.NAMES),
+    help="ArUco detector parameters, fast trades robustness for speed, robust finds small or blurry markers",
+)
+@click.option(
+    "--compact-dictionary",
+    is_flag=True,
+    help="Decode only the board markers with a small custom dictionary, requires a board printed with board_generator.py",
+)
+@click.option("--rebenchmark", is_flag=True, help="Ignore the cached benchmark result and run it again")
+@click.option("--source", default=None, type=click.Path(exists=True), help="Video file or image directory to replay instead of the camera")
+@click.option(
+    "--replay-mode",
+    default=ReplayMode.PACED,
+    show_default=True,
+    type=click.Choice([ReplayMode.PACED, ReplayMode.FAST]),
+    help="Replay at the recorded frame rate or as fast as frames are processed",
+)
+@click.option("--yuyv", is_flag=True, help="Request raw YUYV frames from the camera so detection reads luma directly")
+@click.option("--cpu-warp", is_flag=True, help="Warp the board image on the CPU instead of drawing it with a shader")
+@click.option("--warped-fingertips", is_flag=True, help="Detect the fingertip on a warped board image instead of the camera frame")
+@click.option("--no-background-model", is_flag=True, help="Segment the hand with the global sensitivity threshold only")
+@click.option(
+    "--no-fingertip-prediction",
+    is_flag=True,
+    help="Move the swords to the last detected fingertips instead of predicting them to the current time",
+)
+@click.option("--no-motion-gate", is_flag=True, help="Run the fingertip detection on every frame, even while nothing moves on the board")
 @click.option("--debug", is_flag=True, help="Enable debug mode")
-@click.option("--sensitivity", default=20, show_default=True, type=int, help="Contour sensitivity")
+@click.option("--sensitivity", default=20, show_default=True, type=int, help="Contour sensitivity (initial value unless fixed)")
+@click.option(
+    "--min-contour-area", default=Config.MIN_CONTOUR_AREA, show_default=True, type=int, help="Smallest hand contour in display pixels"
+)
+@click.option(
+    "--fingertip-backend",
+    default=Config.FINGERTIP_BACKEND,
+    show_default=True,
+    type=click.Choice(list(BACKENDS)),
+    help="Hand segmentation: dark contours, connected components or skin colour (compare them with fingertip_benchmark.py)",
+)
+@click.option(
+    "--max-fingertips",
+    default=Config.MAX_FINGERTIPS,
+    show_default=True,
+    type=click.IntRange(min=1),
+    help="Number of fingertips (and swords) tracked per board, one per hand",
+)
+@click.option("--fixed-sensitivity", is_flag=True, help="Keep the sensitivity and background threshold instead of tuning them online")
 @click.option(
     "--board-ids",
-    default="0,1,2,3",
+    default=["0,1,2,3"],
     show_default=True,
-    help="Comma-separated list of marker IDs that are reserved for the game board",
+    multiple=True,
+    help="Comma-separated list of marker IDs that are reserved for a game board, repeat for more players",
 )
-def main(video_id: int, width: int, height: int, camera_width: int, camera_height: int, debug: bool, sensitivity: int, board_ids: str) -> None:
+def main(
+    video_id: int,
+    width: int,
+    height: int,
+    camera_width: int,
+    camera_height: int,
+    preset: str,
+    detector_profile: str,
+    compact_dictionary: bool,
+    rebenchmark: bool,
+    source: Optional[str],
+    replay_mode: str,
+    yuyv: bool,
+    cpu_warp: bool,
+    warped_fingertips: bool,
+    no_background_model: bool,
+    no_fingertip_prediction: bool,
+    no_motion_gate: bool,
+    debug: bool,
+    sensitivity: int,
+    min_contour_area: int,
+    fingertip_backend: str,
+    max_fingertips: int,
+    fixed_sensitivity: bool,
+    board_ids: Tuple[str, ...],
+) -> None:
     """Start the AR board game with the given configuration"""
 
     Config.WINDOW_WIDTH = width
     Config.WINDOW_HEIGHT = height
     Config.DEBUG = debug
     Config.CONTOUR_SENSITIVITY = sensitivity
+    Config.MIN_CONTOUR_AREA = min_contour_area
+    Config.FINGERTIP_BACKEND = fingertip_backend
+    Config.MAX_FINGERTIPS = max_fingertips
+    Config.AUTO_THRESHOLD = not fixed_sensitivity
+    Config.DETECTOR_PROFILE = detector_profile
+    Config.COMPACT_DICTIONARY = compact_dictionary
+    Config.GPU_BOARD_WARP = not cpu_warp
+    Config.CAMERA_SPACE_FINGERTIP = not warped_fingertips
+    Config.BACKGROUND_MODEL = not no_background_model
+    Config.MOTION_GATE = not no_motion_gate
+    Config.FINGERTIP_MOTION_MODEL = not no_fingertip_prediction
+
+    # Apply the performance preset, explicitly passed camera resolutions take precedence
+    if preset != "off":
+        performance_preset = PerformanceBenchmark().select_preset(rebenchmark) if preset == "auto" else PRESETS[preset]
+        performance_preset.apply()
+        print(f"Using {performance_preset}")
+        context = click.get_current_context()
+        if context.get_parameter_source("camera_width") == click.core.ParameterSource.DEFAULT:
+            camera_width = performance_preset.capture_size[0]
+        if context.get_parameter_source("camera_height") == click.core.ParameterSource.DEFAULT:
+            camera_height = performance_preset.capture_size[1]
 
-    # Parse board_ids string into a list of ints
-    board_ids_list = [int(x) for x in board_ids.split(",") if x.strip().isdigit()]
+    # Parse every board_ids string into a list of ints, one board per player
+    boards = [[int(x) for x in ids.split(",") if x.strip().isdigit()] for ids in board_ids]
+    all_ids = [marker_id for ids in boards for marker_id in ids]
+    if len(all_ids) != len(set(all_ids)):
+        raise click.BadParameter("a marker ID can only belong to one board", param_hint="--board-ids")
 
-    GameWindow(video_id=video_id, camera_width=camera_width, camera_height=camera_height, board_ids=board_ids_list)
+    GameWindow(
+        video_id=video_id,
+        camera_width=camera_width,
+        camera_height=camera_height,
+        boards=boards,
+        source=source,
+        replay_mode=replay_mode,
+        yuyv=yuyv,
+    )
 
 
 if __name__ == "__main__":
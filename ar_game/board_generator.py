@@ -0,0 +1,64 @@
+# Writes a printable game board with the board markers in its corners
+import os
+from typing import List, Tuple
+import click
+import cv2
+import numpy as np
+from src.board_dictionary import BoardDictionary
+
+
+@click.command()
+@click.option("-o", "--output", default="board.png", show_default=True, type=click.Path(), help="Output image path")
+@click.option("--width", default=3508, show_default=True, type=int, help="Board width in pixels (A4 landscape at 300 dpi)")
+@click.option("--height", default=2480, show_default=True, type=int, help="Board height in pixels (A4 landscape at 300 dpi)")
+@click.option("--marker-size", default=400, show_default=True, type=int, help="Marker side length in pixels")
+@click.option("--compact-dictionary", is_flag=True, help="Use the compact board dictionary instead of DICT_6X6_250")
+@click.option(
+    "--board-ids",
+    default=["0,1,2,3"],
+    show_default=True,
+    multiple=True,
+    help="Comma-separated marker IDs in the order top-left, top-right, bottom-right, bottom-left, repeat for more boards",
+)
+def main(
+    output: str, width: int, height: int, marker_size: int, compact_dictionary: bool, board_ids: Tuple[str, ...]
+) -> None:
+    """Generate a printable board image for the given marker IDs (one image per board)"""
+    boards = [[int(x) for x in ids.split(",") if x.strip().isdigit()] for ids in board_ids]
+    if any(len(ids) != 4 for ids in boards):
+        raise click.BadParameter("exactly 4 marker IDs are required per board", param_hint="--board-ids")
+    if 2 * marker_size > min(width, height):
+        raise click.BadParameter("markers do not fit onto the board", param_hint="--marker-size")
+
+    # The compact dictionary is built from the IDs of all boards, like in the game
+    board_dictionary = BoardDictionary([marker_id for ids in boards for marker_id in ids], compact_dictionary)
+    root, extension = os.path.splitext(output)
+    for index, ids in enumerate(boards):
+        path = output if len(boards) == 1 else f"{root}_{index + 1}{extension}"
+        write_board(path, ids, board_dictionary, width, height, marker_size)
+
+
+def write_board(
+    path: str, board_ids: List[int], board_dictionary: BoardDictionary, width: int, height: int, marker_size: int
+):
+    """Render one board with its markers in the corners and write it to `path`."""
+    board = np.full((height, width), 255, dtype=np.uint8)
+
+    # Keep a white quiet zone of half a marker around each marker so it can be detected
+    margin = marker_size // 2
+    positions = [
+        (margin, margin),
+        (width - margin - marker_size, margin),
+        (width - margin - marker_size, height - margin - marker_size),
+        (margin, height - margin - marker_size),
+    ]
+    for board_id, (x, y) in zip(board_ids, positions):
+        board[y : y + marker_size, x : x + marker_size] = board_dictionary.marker_image(board_id, marker_size)
+
+    if not cv2.imwrite(path, board):
+        raise click.ClickException(f"Could not write {path}")
+    print(f"Board with markers {board_ids} written to {path}")
+
+
+if __name__ == "__main__":
+    main()
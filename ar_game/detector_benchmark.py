@@ -0,0 +1,85 @@
+# Compares the ArUco detector profiles on recorded footage
+import time
+from typing import Dict, List
+import click
+import cv2.aruco as aruco
+import numpy as np
+from src.config import Config
+from src.detector_profile import DetectorProfile
+from src.replay_source import ReplayMode, ReplaySource
+
+
+def benchmark_profile(source_path: str, profile: str, board_ids: List[int], scale: float) -> Dict[str, float]:
+    """Run one profile over every frame of the recording and collect detection rate and timing."""
+    detector = aruco.ArucoDetector(
+        aruco.getPredefinedDictionary(aruco.DICT_6X6_250), DetectorProfile.create_parameters(profile)
+    )
+    source = ReplaySource(source_path, ReplayMode.FAST, threaded=True)
+    marker_size = (max(1, int(source.width * scale)), max(1, int(source.height * scale)))
+
+    frames = 0
+    board_frames = 0
+    found_markers = 0
+    durations = []
+    sequence = 0
+    while True:
+        frame = source.wait_for_frame(sequence)
+        if frame is None:
+            break
+        sequence = frame.sequence
+        # Resize outside of the timed section, only the detector is compared
+        gray = frame.pyramid.at_size(marker_size)
+        start = time.perf_counter()
+        _, ids, _ = detector.detectMarkers(gray)
+        durations.append(time.perf_counter() - start)
+        frame.release()
+
+        visible = set() if ids is None else set(ids.flatten().tolist()) & set(board_ids)
+        found_markers += len(visible)
+        # The board can be assembled as soon as 3 markers are visible
+        board_frames += len(visible) >= min(3, len(board_ids))
+        frames += 1
+    source.release()
+
+    if frames == 0:
+        raise click.ClickException(f"No frames could be read from {source_path}")
+    return {
+        "frames": frames,
+        "board_rate": board_frames / frames,
+        "marker_rate": found_markers / (frames * len(board_ids)),
+        "mean_ms": float(np.mean(durations)) * 1000,
+        "p95_ms": float(np.percentile(durations, 95)) * 1000,
+    }
+
+
+@click.command()
+@click.option("--source", required=True, type=click.Path(exists=True), help="Video file or image directory to benchmark on")
+@click.option(
+    "--profile",
+    "profiles",
+    multiple=True,
+    type=click.Choice(DetectorProfile.NAMES),
+    help="Profile to benchmark, can be repeated (default: all)",
+)
+@click.option("--scale", default=Config.PROCESSING_SCALE, show_default=True, type=float, help="Detection downscale")
+@click.option(
+    "--board-ids",
+    default="0,1,2,3",
+    show_default=True,
+    help="Comma-separated list of marker IDs that are reserved for the game board",
+)
+def main(source: str, profiles: List[str], scale: float, board_ids: str) -> None:
+    """Report detection rate and time per frame of each detector profile on a recording"""
+    board_ids_list = [int(x) for x in board_ids.split(",") if x.strip().isdigit()]
+
+    print(f"{'profile':<10}{'frames':>8}{'board':>9}{'markers':>9}{'mean ms':>10}{'p95 ms':>9}")
+    for profile in profiles or DetectorProfile.NAMES:
+        result = benchmark_profile(source, profile, board_ids_list, scale)
+        print(
+            f"{profile:<10}{result['frames']:>8}{result['board_rate']:>9.1%}{result['marker_rate']:>9.1%}"
+            f"{result['mean_ms']:>10.2f}{result['p95_ms']:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+# Compares the fingertip detector backends on the same recorded frames
+import csv
+import time
+from typing import Dict, List, Optional, Tuple
+import click
+import cv2
+import numpy as np
+from src.config import Config
+from src.fingertip_backend import BACKENDS
+from src.fingertip_stats import FingertipStats, Point
+from src.marker_detection import MarkerDetection
+from src.object_detection import ObjectDetection
+from src.perspective_transformer import PerspectiveTransformer
+from src.replay_source import ReplayMode, ReplaySource
+from src.resolution_plan import ResolutionPlan
+
+
+class BackendResult:
+    """Latency, stability and accuracy of one backend."""
+
+    def __init__(self):
+        self.stats = FingertipStats()
+        self.durations: List[float] = []
+        # Fingertip of every frame with a visible board
+        self.positions: List[Optional[Point]] = []
+        self.errors: List[float] = []
+        self.hits = 0
+        self.compared_frames = 0
+
+    def compare(self, position: Optional[Point], expected: Optional[Point], tolerance: float):
+        """Compare a detection with the expected fingertip, None expects no detection."""
+        self.compared_frames += 1
+        if position is None or expected is None:
+            # Correct if both agree that there is no fingertip, a missed or a false detection is a miss
+            self.hits += position is None and expected is None
+            return
+        error = float(np.hypot(position[0] - expected[0], position[1] - expected[1]))
+        self.errors.append(error)
+        self.hits += error <= tolerance
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.compared_frames if self.compared_frames else float("nan")
+
+    @property
+    def mean_error(self) -> float:
+        return float(np.mean(self.errors)) if self.errors else float("nan")
+
+
+def load_labels(path: str) -> Dict[int, Optional[Point]]:
+    """Read `frame,x,y` rows (display coordinates, empty x/y for frames without a hand)."""
+    labels = {}
+    with open(path, newline="") as file:
+        for row in csv.reader(file):
+            if not row or not row[0].strip().isdigit():
+                continue
+            frame = int(row[0])
+            labels[frame] = (float(row[1]), float(row[2])) if len(row) > 2 and row[1].strip() else None
+    return labels
+
+
+def benchmark_backends(
+    source_path: str,
+    backends: List[str],
+    board_ids: List[int],
+    labels: Optional[Dict[int, Optional[Point]]],
+    tolerance: float,
+) -> Dict[str, BackendResult]:
+    """Run every backend on every frame of the recording, all of them see exactly the same frames."""
+    source = ReplaySource(source_path, ReplayMode.FAST, threaded=True)
+    resolution_plan = ResolutionPlan.from_config((source.width, source.height))
+    marker_detection = MarkerDetection(board_ids, resolution_plan=resolution_plan)
+    board_transformer = PerspectiveTransformer(flip=True)
+    detections = {name: ObjectDetection(resolution_plan, backend=name) for name in backends}
+    results = {name: BackendResult() for name in backends}
+    fingertip_size = resolution_plan.fingertip_camera_size
+
+    sequence = 0
+    frame_index = 0
+    while True:
+        frame = source.wait_for_frame(sequence)
+        if frame is None:
+            break
+        sequence = frame.sequence
+        marker_frame = frame.pyramid.at_size(resolution_plan.marker_size)
+        marker_size = (marker_frame.shape[1], marker_frame.shape[0])
+        # Replays run faster than real time, use the recorded frame times for the marker filter
+        inner_corners, _ = marker_detection.get_board_data(marker_frame, sequence / source.fps)
+        board_matrix = None
+        if inner_corners is not None:
+            scaled_corners = resolution_plan.marker_to_capture(inner_corners, marker_size)
+            board_matrix = board_transformer.update(scaled_corners, resolution_plan.display_size)
+
+        if board_matrix is not None:
+            # Same inputs as in the game (camera space detection), frame preparation is not timed
+            gray = frame.pyramid.at_size(fingertip_size)
+            color = cv2.resize(frame.image, fingertip_size, interpolation=cv2.INTER_AREA)
+            for name, object_detection in detections.items():
+                camera_frame = color if object_detection.backend.needs_color else gray
+                start = time.perf_counter()
+                fingertips = object_detection.detect_object_in_camera(camera_frame, board_matrix)
+                results[name].durations.append(time.perf_counter() - start)
+                # The highest fingertip is compared, it is the one the single player labels refer to
+                position = fingertips[0].high if fingertips else None
+                results[name].stats.add(True, position)
+                results[name].positions.append(position)
+                if labels is not None and frame_index in labels:
+                    results[name].compare(position, labels[frame_index], tolerance)
+        else:
+            for result in results.values():
+                result.stats.add(False, None)
+        frame.release()
+        frame_index += 1
+    source.release()
+    return results
+
+
+@click.command()
+@click.option("--source", required=True, type=click.Path(exists=True), help="Video file or image directory to benchmark on")
+@click.option(
+    "--backend",
+    "backends",
+    multiple=True,
+    type=click.Choice(list(BACKENDS)),
+    help="Backend to benchmark, can be repeated (default: all)",
+)
+@click.option(
+    "--labels",
+    default=None,
+    type=click.Path(exists=True),
+    help="CSV with frame,x,y of the true fingertip (display coordinates), without it the first backend is the reference",
+)
+@click.option("--tolerance", default=40.0, show_default=True, type=float, help="Largest error of a hit in display pixels")
+@click.option(
+    "--board-ids",
+    default="0,1,2,3",
+    show_default=True,
+    help="Comma-separated list of marker IDs that are reserved for the game board",
+)
+@click.option("--sensitivity", default=Config.CONTOUR_SENSITIVITY, show_default=True, type=int, help="Contour sensitivity")
+def main(
+    source: str, backends: Tuple[str, ...], labels: Optional[str], tolerance: float, board_ids: str, sensitivity: int
+) -> None:
+    """Report latency, detection rate, jitter and accuracy of the fingertip backends on a recording"""
+    Config.CONTOUR_SENSITIVITY = sensitivity
+    # Every backend is timed on every frame with a visible board
+    Config.MOTION_GATE = False
+    board_ids_list = [int(x) for x in board_ids.split(",") if x.strip().isdigit()]
+    backends = list(backends or BACKENDS)
+    label_map = load_labels(labels) if labels else None
+
+    results = benchmark_backends(source, backends, board_ids_list, label_map, tolerance)
+    reference = results[backends[0]]
+    if reference.stats.board_frames == 0:
+        raise click.ClickException(f"The board was not found in {source}")
+
+    if label_map is None:
+        # Without labels the accuracy is the agreement with the first backend
+        print(f"No labels given, accuracy is measured against the {backends[0]} backend")
+        for result in results.values():
+            for position, expected in zip(result.positions, reference.positions):
+                result.compare(position, expected, tolerance)
+
+    print(f"Board visible in {reference.stats.board_frames} frames")
+    print(f"{'backend':<12}{'mean ms':>9}{'p95 ms':>8}{'detected':>10}{'jitter px':>11}{'hits':>8}{'error px':>10}")
+    for name, result in results.items():
+        print(
+            f"{name:<12}{np.mean(result.durations) * 1000:>9.2f}{np.percentile(result.durations, 95) * 1000:>8.2f}"
+            f"{result.stats.detection_rate:>10.1%}{result.stats.jitter:>11.1f}"
+            f"{result.hit_rate:>8.1%}{result.mean_error:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+# Sweeps the fingertip detection settings over a recorded session and recommends the most stable combination
+import itertools
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional, Tuple
+import click
+import cv2
+import numpy as np
+from src.config import Config
+from src.fingertip_stats import FingertipStats
+from src.marker_detection import MarkerDetection
+from src.object_detection import ObjectDetection
+from src.perspective_transformer import PerspectiveTransformer
+from src.replay_source import ReplayMode, ReplaySource
+from src.resolution_plan import ResolutionPlan
+
+
+def evaluate_chunk(
+    frames: List[Optional[np.ndarray]],
+    grid: List[Tuple[int, int]],
+    resolution_plan: ResolutionPlan,
+    max_foreground: float,
+) -> List[List[Optional[Tuple[float, float]]]]:
+    """Detect the fingertip on a chunk of warped boards (None if the board was not visible) with every setting.
+
+    Runs in a worker process. Returns the fingertip per setting and frame, None for frames without a detection
+    or where the threshold floods the board (the board itself is segmented as the hand).
+    """
+    # Sweep the plain global threshold, every frame on its own so chunks are independent
+    Config.AUTO_THRESHOLD = False
+    Config.BACKGROUND_MODEL = False
+    Config.FINGERTIP_ROI_TRACKING = False
+    Config.MOTION_GATE = False
+
+    histograms = [None if frame is None else np.cumsum(np.bincount(frame.ravel(), minlength=256)) for frame in frames]
+    results = []
+    for sensitivity, min_contour_area in grid:
+        Config.CONTOUR_SENSITIVITY = sensitivity
+        Config.MIN_CONTOUR_AREA = min_contour_area
+        object_detection = ObjectDetection(resolution_plan)
+        positions = []
+        for frame, histogram in zip(frames, histograms):
+            if frame is None or histogram[sensitivity] / histogram[-1] > max_foreground:
+                positions.append(None)
+                continue
+            fingertips = object_detection.detect_object(frame)
+            positions.append(fingertips[0].high if fingertips else None)
+        results.append(positions)
+    return results
+
+
+def sweep(
+    source_path: str,
+    board_ids: List[int],
+    grid: List[Tuple[int, int]],
+    workers: int,
+    chunk_size: int,
+    max_foreground: float,
+) -> List[FingertipStats]:
+    """Stream the recording, track the board and evaluate every setting of the grid on a process pool."""
+    source = ReplaySource(source_path, ReplayMode.FAST, threaded=True)
+    resolution_plan = ResolutionPlan.from_config((source.width, source.height))
+    marker_detection = MarkerDetection(board_ids, resolution_plan=resolution_plan)
+    fingertip_transformer = PerspectiveTransformer(flip=True)
+    fingertip_width, fingertip_height = resolution_plan.fingertip_size
+
+    stats = [FingertipStats() for _ in grid]
+    # Chunks are submitted while streaming but their results are consumed in order, jitter spans chunk borders
+    pending = {}
+    finished: Dict[int, Tuple[List[bool], List[List[Optional[Tuple[float, float]]]]]] = {}
+    submitted = consumed = 0
+
+    def consume(futures):
+        nonlocal consumed
+        for future in futures:
+            index, visible = pending.pop(future)
+            finished[index] = (visible, future.result())
+        while consumed in finished:
+            visible, results = finished.pop(consumed)
+            for setting_stats, positions in zip(stats, results):
+                for board_visible, position in zip(visible, positions):
+                    setting_stats.add(board_visible, position)
+            consumed += 1
+
+    # The workers do all the OpenCV work, keep each of them on one thread
+    with ProcessPoolExecutor(max_workers=workers, initializer=cv2.setNumThreads, initargs=(1,)) as executor:
+        chunk: List[Optional[np.ndarray]] = []
+        sequence = 0
+        while True:
+            frame = source.wait_for_frame(sequence)
+            if frame is not None:
+                sequence = frame.sequence
+                marker_frame = frame.pyramid.at_size(resolution_plan.marker_size)
+                marker_size = (marker_frame.shape[1], marker_frame.shape[0])
+                # Replays run faster than real time, use the recorded frame times for the marker filter
+                inner_corners, _ = marker_detection.get_board_data(marker_frame, sequence / source.fps)
+                board = None
+                if inner_corners is not None:
+                    scaled_corners = resolution_plan.marker_to_capture(inner_corners, marker_size)
+                    board = fingertip_transformer.warp(
+                        frame.pyramid.base(),
+                        scaled_corners,
+                        np.empty((fingertip_height, fingertip_width), dtype=np.uint8),
+                    )
+                frame.release()
+                chunk.append(board)
+
+            if chunk and (len(chunk) == chunk_size or frame is None):
+                # Keep a bounded number of chunks in flight, the recording is never held in memory
+                while len(pending) >= 2 * workers:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    consume(done)
+                future = executor.submit(evaluate_chunk, chunk, grid, resolution_plan, max_foreground)
+                pending[future] = (submitted, [board is not None for board in chunk])
+                submitted += 1
+                chunk = []
+            if frame is None:
+                break
+        source.release()
+        consume(list(pending))
+    return stats
+
+
+def _parse_values(values: str, name: str, minimum: int = 0, maximum: Optional[int] = None) -> List[int]:
+    try:
+        parsed = sorted({int(value) for value in values.split(",") if value.strip()})
+    except ValueError:
+        raise click.BadParameter("expected a comma-separated list of integers", param_hint=name)
+    out_of_range = [value for value in parsed if value < minimum or (maximum is not None and value > maximum)]
+    if out_of_range:
+        limits = f"{minimum} to {maximum}" if maximum is not None else f"at least {minimum}"
+        raise click.BadParameter(f"values must be {limits}, got {out_of_range}", param_hint=name)
+    return parsed
+
+
+@click.command()
+@click.option("--source", required=True, type=click.Path(exists=True), help="Video file or image directory to sweep on")
+@click.option(
+    "--sensitivities",
+    default="10,20,30,40,60,80,100",
+    show_default=True,
+    help="Comma-separated contour sensitivities to try",
+)
+@click.option(
+    "--areas",
+    default="250,500,1000,2000,4000",
+    show_default=True,
+    help="Comma-separated minimum contour areas (display pixels) to try",
+)
+@click.option("--width", show_default=True, default=1280, type=int, help="Width of the game window (as in AR_game.py)")
+@click.option("--height", show_default=True, default=720, type=int, help="Height of the game window (as in AR_game.py)")
+@click.option(
+    "--board-ids",
+    default="0,1,2,3",
+    show_default=True,
+    help="Comma-separated list of marker IDs that are reserved for the game board",
+)
+@click.option("--workers", default=os.cpu_count() or 1, show_default=True, type=int, help="Worker processes")
+@click.option("--chunk-size", default=32, show_default=True, type=int, help="Frames per worker task")
+@click.option(
+    "--max-foreground",
+    default=0.4,
+    show_default=True,
+    type=float,
+    help="Largest share of the board a hand may cover, above it the threshold is considered to flood the board",
+)
+@click.option("--top", default=10, show_default=True, type=int, help="Number of settings to list")
+def main(
+    source: str,
+    sensitivities: str,
+    areas: str,
+    width: int,
+    height: int,
+    board_ids: str,
+    workers: int,
+    chunk_size: int,
+    max_foreground: float,
+    top: int,
+) -> None:
+    """Score every combination of sensitivity and minimum contour area on a recording and recommend the best one"""
+    # Contour areas and jitter are measured in display pixels, sweep at the size of the game window
+    Config.WINDOW_WIDTH = width
+    Config.WINDOW_HEIGHT = height
+    board_ids_list = [int(x) for x in board_ids.split(",") if x.strip().isdigit()]
+    grid = list(
+        itertools.product(_parse_values(sensitivities, "--sensitivities", 0, 255), _parse_values(areas, "--areas"))
+    )
+    stats = sweep(source, board_ids_list, grid, max(1, workers), max(1, chunk_size), max_foreground)
+    if not stats or stats[0].board_frames == 0:
+        raise click.ClickException(f"The board was not found in {source}")
+
+    ranking = sorted(zip(grid, stats), key=lambda item: item[1].score, reverse=True)
+    print(f"Board visible in {stats[0].board_frames} frames")
+    print(f"{'sensitivity':>12}{'min area':>10}{'detected':>10}{'jitter px':>11}{'score':>8}")
+    for (sensitivity, min_contour_area), setting_stats in ranking[:top]:
+        print(
+            f"{sensitivity:>12}{min_contour_area:>10}{setting_stats.detection_rate:>10.1%}"
+            f"{setting_stats.jitter:>11.1f}{setting_stats.score:>8.3f}"
+        )
+
+    (sensitivity, min_contour_area), best = ranking[0]
+    if best.score == 0:
+        raise click.ClickException("No setting detected a fingertip, record a clip with a hand on the board")
+    print(
+        f"Recommended: python AR_game.py --width {width} --height {height}"
+        f" --sensitivity {sensitivity} --min-contour-area {min_contour_area}"
+        " (add --fixed-sensitivity --no-background-model to use exactly these values)"
+    )
+
+
+if __name__ == "__main__":
+    main()
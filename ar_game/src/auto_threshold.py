@@ -0,0 +1,68 @@
+from typing import Optional
+import cv2
+import numpy as np
+from src.config import Config
+
+
+class AutoThreshold:
+    """Threshold chosen online with Otsu's method on a running histogram.
+
+    Samples are added every few frames at low resolution and blended into a decaying histogram. The Otsu split
+    of that histogram is only accepted if it separates two clearly different classes (a hand and the board),
+    otherwise the current value is kept. The threshold is then placed in the histogram valley between both
+    classes. Hysteresis keeps the value from flickering between frames.
+    """
+
+    def __init__(self, initial: int):
+        self.value = int(initial)
+        self.histogram = np.zeros(256, dtype=np.float64)
+        self._frames_since_update = 0
+
+    def due(self) -> bool:
+        """Count a frame, True if a new sample should be added on this frame."""
+        self._frames_since_update += 1
+        if self._frames_since_update < Config.AUTO_THRESHOLD_INTERVAL:
+            return False
+        self._frames_since_update = 0
+        return True
+
+    def update(self, image: np.ndarray, mask: Optional[np.ndarray] = None) -> int:
+        """Add a (low resolution) sample of the thresholded image and re-evaluate the threshold."""
+        histogram = cv2.calcHist([image], [0], mask, [256], [0, 256]).ravel()
+        total = histogram.sum()
+        if total == 0:
+            return self.value
+        decay = Config.AUTO_THRESHOLD_DECAY if self.histogram.any() else 1.0
+        self.histogram = (1 - decay) * self.histogram + decay * histogram / total
+
+        candidate = self._otsu()
+        if candidate is not None and abs(candidate - self.value) >= Config.AUTO_THRESHOLD_HYSTERESIS:
+            self.value = candidate
+        return self.value
+
+    def _otsu(self) -> Optional[int]:
+        """Otsu threshold of the running histogram, None if its two classes are not far enough apart."""
+        levels = np.arange(256)
+        class_weight = np.cumsum(self.histogram)
+        class_sum = np.cumsum(self.histogram * levels)
+        total_mean = class_sum[-1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            between_variance = (total_mean * class_weight - class_sum) ** 2 / (class_weight * (1 - class_weight))
+        between_variance = np.nan_to_num(between_variance, nan=0.0, posinf=0.0)
+        threshold = int(np.argmax(between_variance))
+        lower_weight = class_weight[threshold]
+        if between_variance[threshold] <= 0 or lower_weight <= 0 or lower_weight >= 1:
+            return None
+
+        # A single class (e.g. an empty board with a brightness gradient) also has an Otsu split, reject it
+        lower_mean = class_sum[threshold] / lower_weight
+        upper_mean = (total_mean - class_sum[threshold]) / (1 - lower_weight)
+        if upper_mean - lower_mean < Config.AUTO_THRESHOLD_MIN_CONTRAST:
+            return None
+
+        # Otsu leans towards the class with the larger spread (the board), place the threshold in the valley between
+        # both class means instead, the center of the valley if it is flat
+        smoothed = np.convolve(self.histogram, np.ones(5) / 5, mode="same")
+        start, end = int(np.ceil(lower_mean)), int(upper_mean) + 1
+        valley = smoothed[start:end]
+        return start + int(np.median(np.flatnonzero(valley <= valley.min() + 1e-6)))
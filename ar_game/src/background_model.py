@@ -0,0 +1,114 @@
+from typing import Optional, Tuple
+import cv2
+import numpy as np
+from src.config import Config
+from src.resolution_plan import ResolutionPlan
+
+
+class BackgroundModel:
+    """Running-average reference image of the empty board, used to segment the hand.
+
+    The reference is kept in board space at low resolution, so it stays valid while the board moves in the
+    camera image. It is learned from scratch once the board is found, over the first frames and the rest of the
+    countdown (`RESUMING`), and afterwards updated slowly, both only where no hand is present. Detection frames
+    compare against the reference mapped into their own coordinates by `aligned_reference`, which is kept while the
+    board rests.
+    """
+
+    def __init__(self, resolution_plan: ResolutionPlan):
+        display_width, display_height = resolution_plan.display_size
+        self.display_size = resolution_plan.display_size
+        self.size = (
+            max(1, int(display_width * Config.BACKGROUND_MODEL_SCALE)),
+            max(1, int(display_height * Config.BACKGROUND_MODEL_SCALE)),
+        )
+        self.kernel = np.ones((5, 5), np.uint8)
+        self.reference: Optional[np.ndarray] = None
+        self.learned_frames = 0
+        self._frames_since_update = 0
+        # Reference mapped into the last detection bounds, rebuilt when the model, the bounds or the board moved
+        self._aligned: Optional[np.ndarray] = None
+        self._aligned_key: Optional[Tuple] = None
+        self._aligned_corners: Optional[np.ndarray] = None
+        self._model_corners = np.float32([[0, 0], [self.size[0], 0], [self.size[0], self.size[1]], [0, self.size[1]]])
+
+    @property
+    def ready(self) -> bool:
+        return self.learned_frames >= Config.BACKGROUND_LEARNING_FRAMES
+
+    def reset(self):
+        """Forget the reference, it is learned again from the next frames."""
+        self.reference = None
+        self.learned_frames = 0
+        self._aligned_key = None
+
+    def _frame_to_model(self, frame_to_display: np.ndarray, offset: Tuple[int, int] = (0, 0)) -> np.ndarray:
+        """Homography from frame pixels (relative to `offset`) to reference pixels."""
+        display_to_model = np.diag([self.size[0] / self.display_size[0], self.size[1] / self.display_size[1], 1])
+        translation = np.array([[1, 0, offset[0]], [0, 1, offset[1]], [0, 0, 1]], dtype=np.float64)
+        return display_to_model @ frame_to_display @ translation
+
+    def aligned_reference(
+        self, frame_to_display: np.ndarray, bounds: Tuple[int, int, int, int]
+    ) -> Optional[np.ndarray]:
+        """Reference resampled onto the frame region `bounds` (x0, y0, x1, y1), None until the model is learned.
+
+        The board homography jitters by fractions of a pixel while the board rests, the last resampled reference is
+        reused until the board corners moved more than `Config.WARP_REUSE_TOLERANCE` frame pixels.
+        """
+        if not self.ready:
+            return None
+        x0, y0, x1, y1 = bounds
+        frame_to_model = self._frame_to_model(frame_to_display, (x0, y0))
+        corners = cv2.perspectiveTransform(self._model_corners.reshape(-1, 1, 2), np.linalg.inv(frame_to_model))
+        key = (self.learned_frames, bounds)
+        if key != self._aligned_key or np.abs(corners - self._aligned_corners).max() > Config.WARP_REUSE_TOLERANCE:
+            self._aligned = cv2.warpPerspective(
+                self.reference,
+                frame_to_model,
+                (x1 - x0, y1 - y0),
+                flags=cv2.INTER_LINEAR | cv2.WARP_INVERSE_MAP,
+                borderMode=cv2.BORDER_REPLICATE,
+            ).astype(np.uint8)
+            self._aligned_key = key
+            self._aligned_corners = corners
+        return self._aligned
+
+    def update(self, frame: np.ndarray, frame_to_display: np.ndarray, learning: bool, threshold: int):
+        """Blend a frame (luma or BGR) into the reference wherever no hand covers the board.
+
+        `threshold` is the hand threshold the detection currently uses, on the background difference once the model
+        is ready and on the intensity before, so the model excludes the same hand pixels the detection finds.
+        """
+        # A model that is not learned yet keeps learning, even after the countdown
+        learning = learning or not self.ready
+        if not learning:
+            # Outside of the countdown the board only changes slowly (lighting), skip most frames
+            self._frames_since_update += 1
+            if self._frames_since_update < Config.BACKGROUND_UPDATE_INTERVAL:
+                return
+        self._frames_since_update = 0
+
+        gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        sample = cv2.warpPerspective(gray, self._frame_to_model(frame_to_display), self.size)
+        if self.reference is None:
+            self.reference = sample.astype(np.float32)
+            self.learned_frames = 1
+            return
+
+        # Hand pixels are darker than the board, before the model is learned the intensity threshold finds them
+        if self.ready:
+            difference = cv2.subtract(self.reference.astype(np.uint8), sample)
+            _, hand = cv2.threshold(difference, threshold, 255, cv2.THRESH_BINARY)
+        else:
+            _, hand = cv2.threshold(sample, threshold, 255, cv2.THRESH_BINARY_INV)
+        board = cv2.bitwise_not(cv2.dilate(hand, self.kernel, iterations=2))
+
+        # While learning every frame gets the same weight, afterwards the reference adapts slowly
+        rate = 1 / (self.learned_frames + 1) if learning else Config.BACKGROUND_LEARNING_RATE
+        cv2.accumulateWeighted(sample, self.reference, rate, mask=board)
+        if learning:
+            self.learned_frames += 1
+        else:
+            # Invalidate the aligned reference
+            self._aligned_key = None
@@ -0,0 +1,38 @@
+from typing import List, Optional
+import cv2.aruco as aruco
+import numpy as np
+from src.config import Config
+
+
+class BoardDictionary:
+    """ArUco dictionary used for the board markers.
+
+    By default the predefined DICT_6X6_250 is used and marker ids are board ids. The compact dictionary only
+    contains one code per board id (in `board_ids` order) with fewer bits and a larger inter-marker distance,
+    which makes decoding cheaper and rejects more false candidates. Boards printed for the compact dictionary
+    must be generated with `board_generator.py`.
+    """
+
+    # Fixed seed, the generated codes have to match the printed board
+    RANDOM_SEED = 0
+
+    def __init__(self, board_ids: List[int], compact: bool = False, marker_bits: Optional[int] = None):
+        self.board_ids = board_ids
+        self.compact = compact
+        if compact:
+            self.dictionary = aruco.extendDictionary(
+                len(board_ids), marker_bits or Config.COMPACT_MARKER_BITS, randomSeed=self.RANDOM_SEED
+            )
+        else:
+            self.dictionary = aruco.getPredefinedDictionary(aruco.DICT_6X6_250)
+
+    def to_board_ids(self, marker_ids: np.ndarray) -> List[int]:
+        """Translate detected dictionary indices into board ids."""
+        if not self.compact:
+            return [int(marker_id) for marker_id in marker_ids.flatten()]
+        return [self.board_ids[int(marker_id)] for marker_id in marker_ids.flatten()]
+
+    def marker_image(self, board_id: int, size: int) -> np.ndarray:
+        """Render the marker for a board id."""
+        marker_id = self.board_ids.index(board_id) if self.compact else board_id
+        return aruco.generateImageMarker(self.dictionary, marker_id, size)
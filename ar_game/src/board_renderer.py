@@ -0,0 +1,108 @@
+from typing import Tuple
+import numpy as np
+import pyglet
+from pyglet.gl import (
+    GL_BLEND,
+    GL_ONE_MINUS_SRC_ALPHA,
+    GL_SRC_ALPHA,
+    GL_TEXTURE0,
+    GL_TRIANGLES,
+    glActiveTexture,
+    glBindTexture,
+    glBlendFunc,
+    glDisable,
+    glEnable,
+)
+from pyglet.graphics.shader import Shader, ShaderProgram
+
+_VERTEX_SOURCE = """#version 330 core
+in vec2 position;
+out vec2 display_position;
+
+uniform WindowBlock
+{
+    mat4 projection;
+    mat4 view;
+} window;
+
+void main()
+{
+    display_position = position;
+    gl_Position = window.projection * window.view * vec4(position, 0.0, 1.0);
+}
+"""
+
+_FRAGMENT_SOURCE = """#version 330 core
+in vec2 display_position;
+out vec4 final_color;
+
+uniform sampler2D camera_texture;
+// 3x3 homography in the upper left corner, pyglet does not size mat3 uniforms correctly
+uniform mat4 display_to_texture;
+uniform float opacity;
+
+void main()
+{
+    vec3 source = mat3(display_to_texture) * vec3(display_position, 1.0);
+    vec2 uv = source.xy / source.z;
+    // Parts of the board outside of the camera frame stay black, like the border of warpPerspective
+    vec3 color = all(greaterThanEqual(uv, vec2(0.0))) && all(lessThanEqual(uv, vec2(1.0)))
+        ? texture(camera_texture, uv).rgb
+        : vec3(0.0);
+    final_color = vec4(color, opacity);
+}
+"""
+
+
+class ProjectiveBoardRenderer:
+    """Draws the board straight from the camera texture through the board homography.
+
+    The camera frame is uploaded unchanged (see `FrameTransformer.cv2_to_pyglet`) and every fragment of a
+    display sized quad looks up its source pixel through the inverse homography, so no warped board image
+    has to be produced on the CPU. The horizontal mirror is part of the homography.
+    """
+
+    def __init__(self, display_size: Tuple[int, int]):
+        self.display_size = display_size
+        self.program = ShaderProgram(Shader(_VERTEX_SOURCE, "vertex"), Shader(_FRAGMENT_SOURCE, "fragment"))
+        width, height = display_size
+        self.vertex_list = self.program.vertex_list_indexed(
+            4,
+            GL_TRIANGLES,
+            [0, 1, 2, 0, 2, 3],
+            position=("f", (0, 0, width, 0, width, height, 0, height)),
+        )
+
+    def display_to_texture(self, matrix: np.ndarray, capture_size: Tuple[int, int]) -> np.ndarray:
+        """Combine a capture-to-display homography (top-down pixel rows, as used by OpenCV) with the conversions
+        from window coordinates (bottom-up, pixel centers at .5) to normalized camera texture coordinates."""
+        display_height = self.display_size[1]
+        capture_width, capture_height = capture_size
+        window_to_display = np.array([[1, 0, -0.5], [0, -1, display_height - 0.5], [0, 0, 1]])
+        capture_to_texture = np.array(
+            [[1 / capture_width, 0, 0.5 / capture_width], [0, 1 / capture_height, 0.5 / capture_height], [0, 0, 1]]
+        )
+        return capture_to_texture @ np.linalg.inv(matrix) @ window_to_display
+
+    def draw(
+        self,
+        camera_texture: pyglet.image.Texture,
+        matrix: np.ndarray,
+        capture_size: Tuple[int, int],
+        opacity: int = 255,
+    ):
+        """Draw the board into the current view, `matrix` maps capture pixels to board pixels."""
+        self.program.use()
+        # GLSL matrices are column major
+        homography = np.identity(4)
+        homography[:3, :3] = self.display_to_texture(matrix, capture_size)
+        self.program["display_to_texture"] = tuple(homography.T.flatten())
+        self.program["opacity"] = opacity / 255
+        self.program["camera_texture"] = 0
+        glActiveTexture(GL_TEXTURE0)
+        glBindTexture(camera_texture.target, camera_texture.id)
+        glEnable(GL_BLEND)
+        glBlendFunc(GL_SRC_ALPHA, GL_ONE_MINUS_SRC_ALPHA)
+        self.vertex_list.draw(GL_TRIANGLES)
+        glDisable(GL_BLEND)
+        self.program.stop()
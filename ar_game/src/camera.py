@@ -1,17 +1,36 @@
 from typing import Optional, Tuple
 import cv2
 import numpy as np
-from src.config import Config
-
-
-class Camera:
-    def __init__(self, video_id: int, resolution: Optional[Tuple[int, int]] = (640, 480)):
-        """Initialize camera capture with specified device ID."""
+from src.frame_source import FrameSource
+from src.gray_pyramid import PixelFormat
+
+
+class Camera(FrameSource):
+    def __init__(
+        self,
+        video_id: int,
+        resolution: Optional[Tuple[int, int]] = (640, 480),
+        *,
+        threaded: bool = False,
+        yuyv: bool = False,
+    ):
+        """Initialize camera capture with specified device ID.
+
+        In threaded mode frames are grabbed on a background thread and only the newest one is kept.
+        With `yuyv` the raw YUYV stream is requested so detection reads luma without a BGR round trip.
+        """
+        super().__init__(drop_frames=True)
 
         self.cap = cv2.VideoCapture(video_id, cv2.CAP_DSHOW)
         if not self.cap.isOpened():
             raise ValueError(f"Could not open camera with ID {video_id}")
 
+        if yuyv:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"YUYV"))
+            # Fall back to BGR if the backend refuses to deliver unconverted frames
+            if self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0):
+                self.pixel_format = PixelFormat.YUYV
+
         # Use lowest matching resolution for better performance
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, resolution[0])
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, resolution[1])
@@ -19,28 +38,24 @@ class Camera:
         self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
 
-    def get_frame(self) -> Optional[np.ndarray]:
-        """Get current frame in pyglet-compatible format.
+        if threaded:
+            self.start()
 
-        Returns: Tuple containing pyglet image and original OpenCV frame (BGR).
-        """
-        success, frame = self.cap.read()
+    def _read_image(self, dst: np.ndarray) -> Optional[np.ndarray]:
+        # Frames are kept at capture resolution, consumers resample according to the resolution plan
+        success, frame = self.cap.read(image=dst)
         if not success:
             return None
-
-        # Resize the frame to match the window dimensions
-        frame = cv2.resize(frame, (Config.WINDOW_WIDTH, Config.WINDOW_HEIGHT))
-
+        if self.pixel_format == PixelFormat.YUYV and frame.shape != dst.shape:
+            # Some backends deliver raw frames as a single row of bytes
+            if frame.size != dst.size:
+                return None
+            frame = frame.reshape(dst.shape)
         return frame
 
-    def get_dimensions(self) -> Tuple[int, int]:
-        """Get camera frame dimensions."""
-        return (self.width, self.height)
+    def _skip_image(self):
+        self.cap.grab()
 
-    def release(self):
+    def _release_device(self):
         """Release the camera resource."""
         self.cap.release()
-
-    def __del__(self):
-        """Destructor to ensure camera resources are released."""
-        self.release()
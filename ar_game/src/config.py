@@ -16,6 +16,59 @@ class Config:
     CONTOUR_SENSITIVITY: int = 27
     MIN_CONTOUR_AREA: int = 1000
     PROCESSING_SCALE: float = 0.6
+    FINGERTIP_SCALE: float = 0.5
+    CAMERA_SPACE_FINGERTIP: bool = True
+    FINGERTIP_ROI_TRACKING: bool = True
+    FINGERTIP_ROI_PADDING: float = 0.05
+    FINGERTIP_FULL_SCAN_INTERVAL: int = 10
+    MAX_FINGERTIPS: int = 2
+    FINGERTIP_MATCH_DISTANCE: float = 150.0
+    FINGERTIP_TRACK_MAX_MISSES: int = 3
+    FINGERTIP_MOTION_MODEL: bool = True
+    FINGERTIP_VELOCITY_SMOOTHING: float = 0.7
+    FINGERTIP_MAX_EXTRAPOLATION: float = 0.2
+    FINGERTIP_MAX_SPEED: float = 3000.0
+    MOTION_GATE: bool = True
+    MOTION_GATE_SCALE: float = 0.05
+    MOTION_GATE_PIXEL_THRESHOLD: int = 25
+    MOTION_GATE_THRESHOLD: float = 0.005
+    MOTION_GATE_MAX_SKIPPED: int = 15
+    BACKGROUND_MODEL: bool = True
+    BACKGROUND_MODEL_SCALE: float = 0.25
+    BACKGROUND_THRESHOLD: int = 40
+    BACKGROUND_LEARNING_FRAMES: int = 15
+    BACKGROUND_LEARNING_RATE: float = 0.05
+    BACKGROUND_UPDATE_INTERVAL: int = 5
+    AUTO_THRESHOLD: bool = True
+    AUTO_THRESHOLD_INTERVAL: int = 10
+    AUTO_THRESHOLD_SUBSAMPLE: int = 4
+    AUTO_THRESHOLD_DECAY: float = 0.2
+    AUTO_THRESHOLD_HYSTERESIS: int = 6
+    AUTO_THRESHOLD_MIN_CONTRAST: float = 60.0
+    FINGERTIP_BACKEND: str = "contour"
+    SKIN_HSV_LOWER: tuple[int, int, int] = (0, 40, 60)
+    SKIN_HSV_UPPER: tuple[int, int, int] = (20, 255, 255)
+    FRAME_POOL_SIZE: int = 5
+    WARP_REUSE_TOLERANCE: float = 0.5
+    GPU_BOARD_WARP: bool = True
+    MARKER_DETECTION_INTERVAL: int = 2
+    DETECTOR_PROFILE: str = "balanced"
+    COMPACT_DICTIONARY: bool = False
+    COMPACT_MARKER_BITS: int = 4
+    MARKER_ROI_TRACKING: bool = True
+    MARKER_ROI_PADDING: float = 0.6
+    MARKER_FULL_SCAN_INTERVAL: int = 15
+    MARKER_OPTICAL_FLOW: bool = True
+    MARKER_FLOW_MAX_ERROR: float = 1.5
+    MARKER_FILTER_PROCESS_NOISE: float = 1000.0
+    MARKER_FILTER_MEASUREMENT_NOISE: float = 1.0
+    MARKER_CONFIDENCE_STD: float = 24.0
+    MARKER_FILTER_RESTART_AGE: float = 1.0
+    MARKER_AUTO_SCALE: bool = True
+    MIN_MARKER_SIDE: int = 28
+    MIN_PROCESSING_SCALE: float = 0.25
+    MAX_PROCESSING_SCALE: float = 1.0
+    BENCHMARK_TARGET_FPS: int = 30
     
     @staticmethod
     def get_gameobject_base_scale() -> float:
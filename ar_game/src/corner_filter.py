@@ -0,0 +1,111 @@
+from typing import Optional
+import numpy as np
+from src.config import Config
+
+
+class CornerKalmanFilter:
+    """Constant-velocity Kalman filter for a fixed set of 2D points (marker corners).
+
+    Every point has its own timestamp, so points that were not measured keep coasting on their velocity.
+    x and y are filtered independently with the same covariance, stored as the three distinct entries of
+    the symmetric 2x2 position/velocity covariance. A point is confident while it was measured within
+    `restart_age` seconds and its predicted position standard deviation stays low. Only points that were not
+    measured for longer than `restart_age` restart from a measurement, so slow update rates still converge.
+    """
+
+    def __init__(
+        self,
+        point_count: int,
+        process_noise: Optional[float] = None,
+        measurement_noise: Optional[float] = None,
+        initial_velocity_variance: float = 100.0**2,
+        restart_age: Optional[float] = None,
+    ):
+        self.process_noise = process_noise or Config.MARKER_FILTER_PROCESS_NOISE
+        self.measurement_noise = measurement_noise or Config.MARKER_FILTER_MEASUREMENT_NOISE
+        self.initial_velocity_variance = initial_velocity_variance
+        self.restart_age = restart_age or Config.MARKER_FILTER_RESTART_AGE
+        self.positions = np.zeros((point_count, 2))
+        self.velocities = np.zeros((point_count, 2))
+        self.times = np.full(point_count, -np.inf)
+        # Covariance entries: position variance, position/velocity covariance, velocity variance
+        self.p00 = np.full(point_count, np.inf)
+        self.p01 = np.zeros(point_count)
+        self.p11 = np.zeros(point_count)
+
+    def age(self, current_time: float) -> np.ndarray:
+        """Seconds since each point was last measured, inf for points that were never measured."""
+        return current_time - self.times
+
+    def _elapsed(self, current_time: float, indices) -> np.ndarray:
+        """Seconds since each point was last updated, 0 for points that were never measured."""
+        dt = np.maximum(current_time - self.times[indices], 0)
+        return np.where(np.isfinite(dt), dt, 0)
+
+    def _predicted_covariance(self, dt: np.ndarray, indices):
+        q = self.process_noise
+        p00 = self.p00[indices] + 2 * dt * self.p01[indices] + dt * dt * self.p11[indices] + q * dt**3 / 3
+        p01 = self.p01[indices] + dt * self.p11[indices] + q * dt**2 / 2
+        p11 = self.p11[indices] + q * dt
+        return p00, p01, p11
+
+    def position_std(self, current_time: float) -> np.ndarray:
+        """Standard deviation of every point's predicted position at `current_time`."""
+        p00, _, _ = self._predicted_covariance(self._elapsed(current_time, slice(None)), slice(None))
+        return np.sqrt(p00)
+
+    def confident(self, current_time: float) -> np.ndarray:
+        """Points that were measured recently and whose predicted position is still trustworthy."""
+        return (self.age(current_time) <= self.restart_age) & (
+            self.position_std(current_time) < Config.MARKER_CONFIDENCE_STD
+        )
+
+    def predict(self, current_time: float, indices=slice(None)) -> np.ndarray:
+        """Positions extrapolated to `current_time`, the filter state is left untouched."""
+        return self.positions[indices] + self.velocities[indices] * self._elapsed(current_time, indices)[:, None]
+
+    def update(self, indices: np.ndarray, measurements: np.ndarray, current_time: float):
+        """Fuse measured positions (n, 2) of the points at `indices`, taken at `current_time`."""
+        indices = np.asarray(indices)
+        if len(indices) == 0:
+            return
+        measurements = np.asarray(measurements, dtype=np.float64).reshape(-1, 2)
+
+        # Points that were lost for a while (or never measured) restart from the measurement
+        restart = ~(self.age(current_time)[indices] <= self.restart_age)
+        if restart.any():
+            restarted = indices[restart]
+            self.positions[restarted] = measurements[restart]
+            self.velocities[restarted] = 0
+            self.p00[restarted] = self.measurement_noise
+            self.p01[restarted] = 0
+            self.p11[restarted] = self.initial_velocity_variance
+            self.times[restarted] = current_time
+        indices, measurements = indices[~restart], measurements[~restart]
+        if len(indices) == 0:
+            return
+
+        # Predict to the measurement time
+        positions = self.predict(current_time, indices)
+        p00, p01, p11 = self._predicted_covariance(self._elapsed(current_time, indices), indices)
+
+        # Correct with the measured position
+        innovation_variance = p00 + self.measurement_noise
+        position_gain = (p00 / innovation_variance)[:, None]
+        velocity_gain = (p01 / innovation_variance)[:, None]
+        residual = measurements - positions
+        self.positions[indices] = positions + position_gain * residual
+        self.velocities[indices] += velocity_gain * residual
+        self.p00[indices] = p00 * (1 - position_gain[:, 0])
+        self.p11[indices] = p11 - velocity_gain[:, 0] * p01
+        self.p01[indices] = p01 * (1 - position_gain[:, 0])
+        self.times[indices] = current_time
+
+    def rescale(self, ratio: np.ndarray):
+        """Move the state into the coordinates of a resized frame (non-uniform ratios scale the variance by their mean)."""
+        self.positions *= ratio
+        self.velocities *= ratio
+        variance_ratio = float(np.mean(ratio)) ** 2
+        self.p00 *= variance_ratio
+        self.p01 *= variance_ratio
+        self.p11 *= variance_ratio
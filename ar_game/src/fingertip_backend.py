@@ -0,0 +1,98 @@
+from typing import Dict, List, Optional, Sequence, Tuple, Type
+import cv2
+import numpy as np
+from cv2.typing import MatLike
+from src.config import Config
+
+
+class FingertipBackend:
+    """Segments the hand in a window of a detection frame and returns candidate contours in frame coordinates.
+
+    `ObjectDetection` owns everything around the backend (search windows, board mask, background model, the choice
+    of the fingertip among the candidates), so every backend is interchangeable. This base class is the contour
+    backend: a threshold (intensity or background difference) followed by `findContours`.
+    """
+
+    NAME = "contour"
+    # Backends that segment colour get BGR frames, all others get luma
+    needs_color = False
+    # Whether the segmentation uses the intensity / background threshold (and the background model)
+    uses_threshold = True
+
+    def segment(self, image: np.ndarray, reference: Optional[np.ndarray], threshold: int, dst: np.ndarray):
+        """Write the binary hand mask of `image` into `dst`, against the background `reference` if given."""
+        if reference is not None:
+            # The hand is darker than the learned board
+            cv2.subtract(reference, image, dst=dst)
+            cv2.threshold(dst, threshold, 255, cv2.THRESH_BINARY, dst=dst)
+        else:
+            cv2.threshold(image, threshold, 255, cv2.THRESH_BINARY_INV, dst=dst)
+
+    def extract(self, binary: np.ndarray, offset: Tuple[int, int], min_area: float) -> Sequence[MatLike]:
+        """Candidate contours of the binary mask, `min_area` (frame pixels) is a lower bound that may be used to skip blobs."""
+        contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE, offset=offset)
+        return contours
+
+
+class ComponentBackend(FingertipBackend):
+    """Labels the mask with `connectedComponentsWithStats` and only traces the outline of blobs that are large enough.
+
+    Noise blobs are rejected from the component statistics without tracing their contours.
+    """
+
+    NAME = "components"
+
+    def extract(self, binary: np.ndarray, offset: Tuple[int, int], min_area: float) -> Sequence[MatLike]:
+        _, labels, stats, _ = cv2.connectedComponentsWithStats(binary, connectivity=8)
+        contours: List[MatLike] = []
+        # Label 0 is the background
+        for label in np.flatnonzero(stats[1:, cv2.CC_STAT_AREA] >= min_area) + 1:
+            x, y, width, height = stats[label, :4]
+            component = (labels[y : y + height, x : x + width] == label).astype(np.uint8)
+            found, _ = cv2.findContours(
+                component, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE, offset=(x + offset[0], y + offset[1])
+            )
+            contours.extend(found)
+        return contours
+
+
+class SkinColorBackend(FingertipBackend):
+    """Segments skin coloured pixels with a lookup table precomputed from HSV ranges.
+
+    The table covers every BGR colour quantized to 5 bits per channel, so a frame is segmented with one table
+    lookup per pixel instead of a colour conversion and range checks.
+    """
+
+    NAME = "skin"
+    needs_color = True
+    uses_threshold = False
+    QUANTIZATION_SHIFT = 3
+
+    def __init__(self):
+        levels = 256 >> self.QUANTIZATION_SHIFT
+        # Center of every quantized colour, in the index order used by `segment`
+        values = (np.arange(levels, dtype=np.uint8) << self.QUANTIZATION_SHIFT) + (1 << (self.QUANTIZATION_SHIFT - 1))
+        blue, green, red = np.meshgrid(values, values, values, indexing="ij")
+        colors = np.stack([blue, green, red], axis=-1).reshape(-1, 1, 3)
+        hsv = cv2.cvtColor(colors, cv2.COLOR_BGR2HSV)
+        skin = cv2.inRange(hsv, Config.SKIN_HSV_LOWER, Config.SKIN_HSV_UPPER)
+        # Red hues wrap around at 180
+        wrapped_lower = (180 - Config.SKIN_HSV_UPPER[0], *Config.SKIN_HSV_LOWER[1:])
+        skin |= cv2.inRange(hsv, wrapped_lower, (180, *Config.SKIN_HSV_UPPER[1:]))
+        self.table = skin.reshape(-1)
+
+    def segment(self, image: np.ndarray, reference: Optional[np.ndarray], threshold: int, dst: np.ndarray):
+        quantized = (image >> self.QUANTIZATION_SHIFT).astype(np.uint16)
+        bits = 8 - self.QUANTIZATION_SHIFT
+        index = (quantized[..., 0] << (2 * bits)) | (quantized[..., 1] << bits) | quantized[..., 2]
+        np.take(self.table, index, out=dst)
+
+
+BACKENDS: Dict[str, Type[FingertipBackend]] = {
+    backend.NAME: backend for backend in (FingertipBackend, ComponentBackend, SkinColorBackend)
+}
+
+
+def create_backend(name: Optional[str] = None) -> FingertipBackend:
+    """Create the backend with the given name (defaults to the configured one)."""
+    return BACKENDS[name or Config.FINGERTIP_BACKEND]()
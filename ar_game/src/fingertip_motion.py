@@ -0,0 +1,82 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from src.config import Config
+from src.fingertip_tracker import Fingertip
+
+
+class _TrackMotion:
+    """Constant-velocity motion of the fingertip and base point of one track."""
+
+    def __init__(self, points: np.ndarray, timestamp: float):
+        self.points = points
+        self.velocity = np.zeros_like(points)
+        self.time = timestamp
+        # Trajectory before the latest result, faded out over one result interval so the sword does not jump
+        self._previous: Optional[Tuple[np.ndarray, np.ndarray, float]] = None
+        self._blend_start = 0.0
+        self._blend_duration = 0.0
+
+    def add(self, points: np.ndarray, timestamp: float, now: float):
+        dt = timestamp - self.time
+        if dt <= 0:
+            return
+        self._previous = (self.points, self.velocity, self.time)
+        # Differences of noisy detections are noisier than the detections, smooth the velocity
+        measured_velocity = (points - self.points) / dt
+        velocity = self.velocity + Config.FINGERTIP_VELOCITY_SMOOTHING * (measured_velocity - self.velocity)
+        # A detection that jumps to another part of the hand is not movement, limit the speed of every point
+        speed = np.linalg.norm(velocity, axis=1, keepdims=True)
+        self.velocity = velocity * np.minimum(1, Config.FINGERTIP_MAX_SPEED / np.maximum(speed, 1e-6))
+        self.points, self.time = points, timestamp
+        self._blend_start = now
+        self._blend_duration = min(dt, Config.FINGERTIP_MAX_EXTRAPOLATION)
+
+    def sample(self, current_time: float) -> np.ndarray:
+        points = _extrapolate(self.points, self.velocity, self.time, current_time)
+        if self._previous is not None and current_time < self._blend_start + self._blend_duration:
+            # Interpolate from the trajectory of the previous result to the one of the latest result
+            weight = max(current_time - self._blend_start, 0) / self._blend_duration
+            previous = _extrapolate(*self._previous, current_time)
+            points = previous + weight * (points - previous)
+        return points
+
+
+def _extrapolate(points: np.ndarray, velocity: np.ndarray, timestamp: float, current_time: float) -> np.ndarray:
+    """Points moved on to `current_time`, at most `Config.FINGERTIP_MAX_EXTRAPOLATION` seconds past their capture."""
+    return points + velocity * min(max(current_time - timestamp, 0), Config.FINGERTIP_MAX_EXTRAPOLATION)
+
+
+class FingertipMotion:
+    """Motion model of the tracked fingertips of a board, sampled at render time.
+
+    Vision results arrive slower than the game updates and are already old when they arrive. Every result is
+    stamped with the capture time of its frame, the model estimates a velocity per track from consecutive results
+    and predicts the fingertips to the time they are drawn. The prediction runs at most
+    `Config.FINGERTIP_MAX_EXTRAPOLATION` seconds past the latest capture.
+    """
+
+    def __init__(self):
+        self._tracks: Dict[int, _TrackMotion] = {}
+
+    def update(self, fingertips: List[Fingertip], timestamp: float, now: float):
+        """Add the fingertips of a result captured at `timestamp` (monotonic), tracks missing from it are dropped."""
+        tracks = {}
+        for fingertip in fingertips:
+            if fingertip.low is None:
+                continue
+            points = np.array([fingertip.high, fingertip.low], dtype=np.float64)
+            track = self._tracks.get(fingertip.track_id)
+            if track is None:
+                track = _TrackMotion(points, timestamp)
+            else:
+                track.add(points, timestamp, now)
+            tracks[fingertip.track_id] = track
+        self._tracks = tracks
+
+    def sample(self, current_time: float) -> List[Fingertip]:
+        """Fingertips of all tracks predicted to `current_time` (monotonic)."""
+        fingertips = []
+        for track_id, track in self._tracks.items():
+            (high_x, high_y), (low_x, low_y) = track.sample(current_time)
+            fingertips.append(Fingertip((float(high_x), float(high_y)), (float(low_x), float(low_y)), track_id))
+        return fingertips
@@ -0,0 +1,46 @@
+from typing import List, Optional, Tuple
+import numpy as np
+
+Point = Tuple[float, float]
+
+
+class FingertipStats:
+    """Detection rate and fingertip jitter of one detector setting, accumulated over the frames in order."""
+
+    def __init__(self):
+        self.board_frames = 0
+        self.detections = 0
+        self.jitter_sum = 0.0
+        self.jitter_count = 0
+        self._history: List[Point] = []
+
+    def add(self, board_visible: bool, position: Optional[Point]):
+        if not board_visible:
+            self._history = []
+            return
+        self.board_frames += 1
+        if position is None:
+            self._history = []
+            return
+        self.detections += 1
+        # Jitter is the deviation from constant velocity (second difference), real hand movement is mostly smooth
+        self._history = (self._history + [position])[-3:]
+        if len(self._history) == 3:
+            (x0, y0), (x1, y1), (x2, y2) = self._history
+            self.jitter_sum += float(np.hypot(x2 - 2 * x1 + x0, y2 - 2 * y1 + y0))
+            self.jitter_count += 1
+
+    @property
+    def detection_rate(self) -> float:
+        return self.detections / self.board_frames if self.board_frames else 0.0
+
+    @property
+    def jitter(self) -> float:
+        return self.jitter_sum / self.jitter_count if self.jitter_count else float("inf")
+
+    @property
+    def score(self) -> float:
+        """Detection rate, discounted by the jitter in display pixels."""
+        if self.jitter_count == 0:
+            return 0.0
+        return self.detection_rate / (1 + self.jitter / 25)
@@ -0,0 +1,64 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from src.config import Config
+
+Point = Tuple[float, float]
+
+
+class Fingertip:
+    """A fingertip on the board in display coordinates, `high` is the tip and `low` the base of its hand."""
+
+    def __init__(self, high: Point, low: Optional[Point], track_id: int = -1):
+        self.high = high
+        self.low = low
+        # Stable across frames while the fingertip is tracked, assigned by `FingertipTracker`
+        self.track_id = track_id
+
+
+class FingertipTracker:
+    """Keeps the IDs of fingertips stable across frames.
+
+    Detections are matched greedily to the last position of every track, the closest pair first, up to
+    `Config.FINGERTIP_MATCH_DISTANCE`. Unmatched detections start new tracks, a track is kept for a few missed
+    frames so a flickering detection keeps its ID.
+    """
+
+    def __init__(self):
+        self._next_id = 0
+        # Track ID -> last position and the number of frames it has been missing
+        self._tracks: Dict[int, Tuple[Point, int]] = {}
+
+    def update(self, fingertips: List[Fingertip]) -> List[Fingertip]:
+        """Assign track IDs to the fingertips of a new frame (in place) and return them."""
+        track_ids = list(self._tracks)
+        matches: Dict[int, int] = {}
+        if track_ids and fingertips:
+            last_positions = np.array([self._tracks[track_id][0] for track_id in track_ids])
+            positions = np.array([fingertip.high for fingertip in fingertips])
+            distances = np.linalg.norm(positions[:, None] - last_positions[None], axis=2)
+            matched_tracks = set()
+            for flat_index in np.argsort(distances, axis=None):
+                index, track = np.unravel_index(flat_index, distances.shape)
+                if distances[index, track] > Config.FINGERTIP_MATCH_DISTANCE:
+                    break
+                if index in matches or track in matched_tracks:
+                    continue
+                matches[index] = track_ids[track]
+                matched_tracks.add(track)
+
+        tracks = {}
+        for index, fingertip in enumerate(fingertips):
+            if index in matches:
+                fingertip.track_id = matches[index]
+            else:
+                fingertip.track_id = self._next_id
+                self._next_id += 1
+            tracks[fingertip.track_id] = (fingertip.high, 0)
+        for track_id, (position, missed_frames) in self._tracks.items():
+            if track_id not in tracks and missed_frames < Config.FINGERTIP_TRACK_MAX_MISSES:
+                tracks[track_id] = (position, missed_frames + 1)
+        self._tracks = tracks
+        return fingertips
+
+    def reset(self):
+        self._tracks = {}
@@ -0,0 +1,60 @@
+import threading
+from typing import List, Optional, Tuple
+import numpy as np
+
+
+class PooledBuffer:
+    """A preallocated array checked out of a FramePool.
+
+    Every stage that holds on to the buffer owns a reference. The buffer returns to the pool once every
+    owner called `release`, so a stage must only write into a buffer it exclusively owns.
+    """
+
+    def __init__(self, pool: "FramePool", array: np.ndarray):
+        self.pool = pool
+        self.array = array
+        self._references = 0
+
+    def retain(self) -> "PooledBuffer":
+        """Add an owner and return the buffer for convenience."""
+        with self.pool._lock:
+            self._references += 1
+        return self
+
+    def release(self):
+        """Drop an owner, the last owner returns the buffer to the pool."""
+        self.pool._release(self)
+
+
+class FramePool:
+    """Fixed set of preallocated frame buffers shared between pipeline stages."""
+
+    def __init__(self, shape: Tuple[int, ...], size: int, dtype: type = np.uint8):
+        self.shape = shape
+        self.size = size
+        self._lock = threading.Lock()
+        self._available = threading.Condition(self._lock)
+        self._free: List[PooledBuffer] = [PooledBuffer(self, np.empty(shape, dtype=dtype)) for _ in range(size)]
+
+    def acquire(self, timeout: Optional[float] = None) -> Optional[PooledBuffer]:
+        """Check out a free buffer owned by the caller. Returns None if the pool stays exhausted until the timeout."""
+        with self._available:
+            if not self._available.wait_for(lambda: len(self._free) > 0, timeout=timeout):
+                return None
+            buffer = self._free.pop()
+            buffer._references = 1
+            return buffer
+
+    def free_count(self) -> int:
+        """Number of buffers currently not owned by any stage."""
+        with self._lock:
+            return len(self._free)
+
+    def _release(self, buffer: PooledBuffer):
+        with self._available:
+            if buffer._references <= 0:
+                raise RuntimeError("Released a buffer that is not owned")
+            buffer._references -= 1
+            if buffer._references == 0:
+                self._free.append(buffer)
+                self._available.notify()
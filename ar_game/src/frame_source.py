@@ -0,0 +1,224 @@
+import threading
+from abc import ABC, abstractmethod
+import time
+from typing import Dict, Optional, Tuple
+import cv2
+import numpy as np
+from src.config import Config
+from src.frame_pool import FramePool, PooledBuffer
+from src.gray_pyramid import GrayPyramid, PixelFormat
+
+
+class CapturedFrame:
+    """A single frame stamped with its monotonic capture time and sequence number.
+
+    The image lives in a pooled buffer, every holder must call `release` once it is done with the frame
+    and must never write into the image. Detectors read luma from `pyramid`, colour is only needed for display.
+    """
+
+    def __init__(
+        self,
+        image: np.ndarray,
+        timestamp: float,
+        sequence: int,
+        buffer: Optional[PooledBuffer] = None,
+        *,
+        pixel_format: str = PixelFormat.BGR,
+        pyramid: Optional[GrayPyramid] = None,
+    ):
+        self.image = image
+        self.timestamp = timestamp
+        self.sequence = sequence
+        self.buffer = buffer
+        self.pixel_format = pixel_format
+        if pyramid is None:
+            pyramid = GrayPyramid()
+        pyramid.reset(image, pixel_format)
+        self.pyramid = pyramid
+
+    def to_bgr(self, dst: np.ndarray) -> np.ndarray:
+        """Colour image for display. BGR frames are returned as is, other formats are converted into `dst`."""
+        if self.pixel_format == PixelFormat.BGR:
+            return self.image
+        return cv2.cvtColor(self.image, cv2.COLOR_YUV2BGR_YUYV, dst=dst)
+
+    def age(self) -> float:
+        """Seconds elapsed since the frame was captured."""
+        return time.monotonic() - self.timestamp
+
+    def retain(self) -> "CapturedFrame":
+        """Add an owner of the underlying buffer."""
+        if self.buffer is not None:
+            self.buffer.retain()
+        return self
+
+    def release(self):
+        """Drop ownership of the underlying buffer."""
+        if self.buffer is not None:
+            self.buffer.release()
+
+
+class FrameSource(ABC):
+    """Base class for frame producers (camera, replay, ...).
+
+    Subclasses must implement `_read_image` and `_release_device`. Frames are read into buffers of a fixed
+    frame pool. In threaded mode frames are read on a background thread and published into a latest-frame
+    slot. If `drop_frames` is disabled the reader waits until the previous frame was consumed via
+    `wait_for_frame` so no frame is skipped.
+    """
+
+    def __init__(self, *, drop_frames: bool = True):
+        self.width = 0
+        self.height = 0
+        self.drop_frames = drop_frames
+        self.finished = False
+        self.pixel_format = PixelFormat.BGR
+        self.frame_pool: Optional[FramePool] = None
+        # One pyramid per pooled buffer so its level storage is reused with the buffer
+        self._pyramids: Dict[int, GrayPyramid] = {}
+
+        # Latest-frame slot shared with the reader thread
+        self._sequence = 0
+        self._consumed_sequence = 0
+        self._latest_frame: Optional[CapturedFrame] = None
+        self._frame_condition = threading.Condition()
+        self._stop_event = threading.Event()
+        self._capture_thread: Optional[threading.Thread] = None
+
+    @abstractmethod
+    def _read_image(self, dst: np.ndarray) -> Optional[np.ndarray]:
+        """Read the next image from the underlying device, ideally into `dst`. Returns None if no frame is available."""
+
+    def _skip_image(self):
+        """Drop the next image without decoding it, used while the frame pool is exhausted."""
+        pass
+
+    @abstractmethod
+    def _release_device(self):
+        """Release the underlying device."""
+
+    def start(self):
+        """Start reading frames on a background thread."""
+        if self._capture_thread is not None:
+            return
+        self._stop_event.clear()
+        self._capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
+        self._capture_thread.start()
+
+    def _capture_loop(self):
+        while not self._stop_event.is_set() and not self.finished:
+            captured_frame = self._capture()
+            if captured_frame is None:
+                # Avoid spinning when the device stops delivering frames
+                time.sleep(0.005)
+                continue
+
+            with self._frame_condition:
+                if not self.drop_frames:
+                    # Wait until the consumer took the previous frame
+                    self._frame_condition.wait_for(
+                        lambda: self._consumed_sequence >= self._sequence - 1 or self._stop_event.is_set()
+                    )
+                # Replace the slot, the slot's reference to the older frame is dropped
+                if self._latest_frame is not None:
+                    self._latest_frame.release()
+                self._latest_frame = captured_frame
+                self._frame_condition.notify_all()
+
+        # Wake up consumers waiting for a frame that will never come
+        with self._frame_condition:
+            self._frame_condition.notify_all()
+
+    def _capture(self) -> Optional[CapturedFrame]:
+        """Read a frame from the device into a pooled buffer and stamp it."""
+        if self.frame_pool is None:
+            channels = 2 if self.pixel_format == PixelFormat.YUYV else 3
+            self.frame_pool = FramePool((self.height, self.width, channels), Config.FRAME_POOL_SIZE)
+            self._pyramids = {}
+        buffer = self.frame_pool.acquire(timeout=0.1)
+        if buffer is None:
+            # Every buffer is still owned downstream, drop this frame
+            self._skip_image()
+            return None
+
+        image = self._read_image(buffer.array)
+        timestamp = time.monotonic()
+        if image is None:
+            buffer.release()
+            return None
+        if image is not buffer.array:
+            if image.shape != buffer.array.shape:
+                # The device delivers a different resolution than announced, rebuild the pool
+                buffer.release()
+                self.height, self.width = image.shape[:2]
+                self.frame_pool = None
+                return None
+            # Sources without a dst= capable reader
+            np.copyto(buffer.array, image)
+
+        self._sequence += 1
+        pyramid = self._pyramids.get(id(buffer))
+        if pyramid is None:
+            pyramid = self._pyramids[id(buffer)] = GrayPyramid()
+        return CapturedFrame(
+            buffer.array, timestamp, self._sequence, buffer, pixel_format=self.pixel_format, pyramid=pyramid
+        )
+
+    def get_latest_frame(self) -> Optional[CapturedFrame]:
+        """Get the newest captured frame without blocking. Requires threaded mode.
+
+        The returned frame is retained for the caller, who must `release` it.
+        """
+        with self._frame_condition:
+            if self._latest_frame is None:
+                return None
+            return self._latest_frame.retain()
+
+    def wait_for_frame(self, after_sequence: int = 0, timeout: Optional[float] = None) -> Optional[CapturedFrame]:
+        """Block until a frame newer than `after_sequence` is available or the timeout expires.
+
+        The returned frame is retained for the caller, who must `release` it.
+        """
+        with self._frame_condition:
+            self._frame_condition.wait_for(
+                lambda: (self._latest_frame is not None and self._latest_frame.sequence > after_sequence)
+                or self.finished,
+                timeout=timeout,
+            )
+            frame = self._latest_frame
+            if frame is None or frame.sequence <= after_sequence:
+                return None
+            self._consumed_sequence = frame.sequence
+            self._frame_condition.notify_all()
+            return frame.retain()
+
+    def get_frame(self) -> Optional[np.ndarray]:
+        """Get a copy of the current frame (BGR). Returns the newest slot frame in threaded mode."""
+        captured_frame = self.get_latest_frame() if self._capture_thread is not None else self._capture()
+        if captured_frame is None:
+            return None
+        image = captured_frame.to_bgr(np.empty((self.height, self.width, 3), dtype=np.uint8)).copy()
+        captured_frame.release()
+        return image
+
+    def get_dimensions(self) -> Tuple[int, int]:
+        """Get frame dimensions."""
+        return (self.width, self.height)
+
+    def release(self):
+        """Stop the reader thread and release the device."""
+        self._stop_event.set()
+        with self._frame_condition:
+            self._frame_condition.notify_all()
+        if self._capture_thread is not None and self._capture_thread is not threading.current_thread():
+            self._capture_thread.join(timeout=1)
+        self._capture_thread = None
+        with self._frame_condition:
+            if self._latest_frame is not None:
+                self._latest_frame.release()
+                self._latest_frame = None
+        self._release_device()
+
+    def __del__(self):
+        """Destructor to ensure resources are released."""
+        self.release()
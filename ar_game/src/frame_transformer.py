@@ -1,3 +1,4 @@
+import ctypes
 import cv2
 import numpy as np
 import pyglet
@@ -6,10 +7,23 @@ import pyglet
 class FrameTransformer:
     @staticmethod
     def cv2_to_pyglet(img: np.ndarray) -> pyglet.image.ImageData:
-        img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)  # Convert BGR to RGB for pyglet
+        """Wrap a BGR frame for upload without copying or converting it.
+
+        The data is referenced in place and rows stay in OpenCV's top-down order, so the texture has to be
+        drawn flipped vertically (see `flipped_region`). The frame must stay untouched until the upload is done.
+        """
         rows, cols, channels = img.shape
         bytes_per_row = channels * cols
-        return pyglet.image.ImageData(width=cols, height=rows, fmt="RGB", data=img.tobytes(), pitch=-bytes_per_row)
+        return pyglet.image.ImageData(
+            width=cols, height=rows, fmt="BGR", data=img.ctypes.data_as(ctypes.c_void_p), pitch=bytes_per_row
+        )
+
+    @staticmethod
+    def flipped_region(texture: pyglet.image.Texture) -> pyglet.image.TextureRegion:
+        """Region of a texture filled by `cv2_to_pyglet` that displays the frame upright."""
+        region = texture.get_transform(flip_y=True)
+        region.anchor_y = 0
+        return region
 
     @staticmethod
     def postprocess_frame(frame: np.ndarray) -> np.ndarray:
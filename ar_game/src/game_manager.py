@@ -1,6 +1,6 @@
 import math
 from collections import deque
-from typing import Deque, List
+from typing import Deque, Dict, List, Optional
 import pyglet
 from pyglet.graphics import Batch
 from src.level_manager import LevelManager
@@ -9,11 +9,12 @@ from src.image_loader import ImageLoader
 from src.vector_2d import Vector2D
 import random
 from src.game_object import GameObject
+from src.fingertip_tracker import Fingertip
 
 
 class GameManager:
     gameobjects: list[GameObject] = []
-    sword: GameObject
+    swords: List[GameObject]
     point_labels: Deque[pyglet.text.Label] = deque(maxlen=10)
     spawning_enabled: bool = False
     _spawn_cooldown: float = Config.OBJECT_INTERVAL
@@ -22,9 +23,18 @@ class GameManager:
 
     def __init__(self, batch: Batch):
         self.batch = batch
-        self.sword = GameObject(ImageLoader().get_sprite("sword.png", rotation=45, scale=1.2))
-        self.sword.batch = self.batch
-        self.sword.visible = False
+        # Per instance, several boards run their own game
+        self.gameobjects = []
+        self.point_labels = deque(maxlen=10)
+        # One sword per tracked fingertip, all of them are created up front and handed out by track ID
+        sword_sprite = ImageLoader().get_sprite("sword.png", rotation=45, scale=1.2)
+        self.swords = []
+        for _ in range(Config.MAX_FINGERTIPS):
+            sword = GameObject(sword_sprite)
+            sword.batch = self.batch
+            sword.visible = False
+            self.swords.append(sword)
+        self.track_swords: Dict[int, GameObject] = {}
 
         self.level_manager = LevelManager(self, self.batch)
 
@@ -93,7 +103,7 @@ class GameManager:
     def set_spawning_enabled(self, enabled: bool):
         self.spawning_enabled = enabled
 
-    def update(self, dt: float, high: tuple[float, float] = None, low: tuple[float, float] = None):
+    def update(self, dt: float, fingertips: Optional[List[Fingertip]] = None):
         """Update the game state."""
 
         # Spawn gameobjects if needed
@@ -109,7 +119,7 @@ class GameManager:
                 )  # Randomize spawn interval
 
         # Update gameobjects
-        self._update_sword(high, low)
+        self._update_swords(fingertips or [])
         for obj in self.gameobjects:
             obj.physics_update(dt)
 
@@ -177,21 +187,13 @@ class GameManager:
             obj.delete()
 
     def check_collisions(self):
-        """Check for collisions between the sword and game objects."""
+        """Check for collisions between the swords and game objects."""
         for obj in self.gameobjects:
             if obj.off_screen:
                 continue
 
-            # Calculate distance between centers
-            dx = abs(self.sword.x - obj.x)
-            dy = abs(self.sword.y - obj.y)
-
-            # Check if the objects' rectangles overlap
-            colliding = dx < (self.sword.width // 2 + obj.width // 2) and dy < (
-                self.sword.height // 2 + obj.height // 2
-            )
-
-            if self.sword.visible and colliding:
+            # Any visible sword slashes the object
+            if any(sword.visible and self._is_colliding(sword, obj) for sword in self.swords):
                 # Update points, init points label, delete object
                 self.level_manager.increment_points(obj.points)
                 label = pyglet.text.Label(
@@ -209,11 +211,38 @@ class GameManager:
                 self.gameobjects.remove(obj)
                 obj.delete()
 
-    def _update_sword(self, high: tuple[float, float] = None, low: tuple[float, float] = None):
-        """Set the visibility, position, and rotation of the sword based on high and low coordinates."""
+    @staticmethod
+    def _is_colliding(sword: GameObject, obj: GameObject) -> bool:
+        # Calculate distance between centers
+        dx = abs(sword.x - obj.x)
+        dy = abs(sword.y - obj.y)
+
+        # Check if the objects' rectangles overlap
+        return dx < (sword.width // 2 + obj.width // 2) and dy < (sword.height // 2 + obj.height // 2)
+
+    def _update_swords(self, fingertips: List[Fingertip]):
+        """Move the sword of every fingertip track, swords of tracks that disappeared are hidden and reused."""
+        track_ids = {fingertip.track_id for fingertip in fingertips}
+        for track_id in [track_id for track_id in self.track_swords if track_id not in track_ids]:
+            self.track_swords.pop(track_id).visible = False
+
+        free_swords = [sword for sword in self.swords if sword not in self.track_swords.values()]
+        for fingertip in fingertips:
+            sword = self.track_swords.get(fingertip.track_id)
+            if sword is None:
+                if not free_swords:
+                    continue
+                # A new track starts at its fingertip instead of sliding over from where the sword was last seen
+                sword = free_swords.pop()
+                sword.x, sword.y = fingertip.high
+                self.track_swords[fingertip.track_id] = sword
+            self._update_sword(sword, fingertip.high, fingertip.low)
+
+    def _update_sword(self, sword: GameObject, high: tuple[float, float] = None, low: tuple[float, float] = None):
+        """Set the visibility, position, and rotation of a sword based on high and low coordinates."""
         if high is not None and low is not None:
             # Handle sword positioning and rotation
-            self.sword.visible = True
+            sword.visible = True
 
             # Calculate rotation angle based on direction from low to high
             dx = high[0] - low[0]
@@ -229,15 +258,15 @@ class GameManager:
 
             # Lerp position with higher factor for smoother movement
             position_lerp_factor = 0.45
-            self.sword.x = self.sword.x + (high[0] - self.sword.x) * position_lerp_factor
-            self.sword.y = self.sword.y + (high[1] - self.sword.y) * position_lerp_factor
+            sword.x = sword.x + (high[0] - sword.x) * position_lerp_factor
+            sword.y = sword.y + (high[1] - sword.y) * position_lerp_factor
 
             # Lerp rotation with slightly lower factor for smoother rotation
             rotation_lerp_factor = 0.18
-            angle_diff = (angle - self.sword.rotation) % 360
+            angle_diff = (angle - sword.rotation) % 360
             if angle_diff > 180:
                 angle_diff -= 360
 
-            self.sword.rotation = self.sword.rotation + angle_diff * rotation_lerp_factor
+            sword.rotation = sword.rotation + angle_diff * rotation_lerp_factor
         else:
-            self.sword.visible = False
+            sword.visible = False
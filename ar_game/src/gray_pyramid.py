@@ -0,0 +1,92 @@
+import threading
+from typing import Dict, Optional, Tuple
+import cv2
+import numpy as np
+
+
+class PixelFormat:
+    BGR = "BGR"
+    YUYV = "YUYV"
+
+
+class GrayPyramid:
+    """Lazily built grayscale views of a single frame.
+
+    The base level is the full-resolution luma plane. Detectors read either an octave level (`level`) or a level
+    at an exact resolution (`at_size`), both are computed on first access from the base and cached for the frame.
+    Storage is kept when the pyramid is reset for the next frame, so a pyramid bound to a pooled buffer never
+    reallocates while the resolution stays the same.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._image: Optional[np.ndarray] = None
+        self._pixel_format = PixelFormat.BGR
+        self._storage: Dict[Tuple, np.ndarray] = {}
+        self._valid: set = set()
+
+    def reset(self, image: np.ndarray, pixel_format: str = PixelFormat.BGR):
+        """Bind the pyramid to a new frame, cached levels become invalid."""
+        with self._lock:
+            self._image = image
+            self._pixel_format = pixel_format
+            self._valid.clear()
+
+    def base(self) -> np.ndarray:
+        """Full-resolution luma plane."""
+        with self._lock:
+            return self._base()
+
+    def level(self, index: int) -> np.ndarray:
+        """Octave level, each level halves the resolution of the previous one (0 is the base)."""
+        with self._lock:
+            return self._level(index)
+
+    def at_size(self, size: Tuple[int, int]) -> np.ndarray:
+        """Luma plane resampled once from the base to the given (width, height)."""
+        with self._lock:
+            key = ("size", size)
+            if key in self._valid:
+                return self._storage[key]
+            base = self._base()
+            if (base.shape[1], base.shape[0]) == size:
+                return base
+            dst = self._buffer(key, (size[1], size[0]))
+            cv2.resize(base, size, dst=dst, interpolation=cv2.INTER_AREA)
+            self._valid.add(key)
+            return dst
+
+    def _base(self) -> np.ndarray:
+        key = ("level", 0)
+        if key in self._valid:
+            return self._storage[key]
+        if self._image is None:
+            raise RuntimeError("Pyramid is not bound to a frame")
+        dst = self._buffer(key, self._image.shape[:2])
+        if self._pixel_format == PixelFormat.YUYV:
+            # Luma is already interleaved in the first channel, no colour conversion required
+            cv2.extractChannel(self._image, 0, dst=dst)
+        else:
+            cv2.cvtColor(self._image, cv2.COLOR_BGR2GRAY, dst=dst)
+        self._valid.add(key)
+        return dst
+
+    def _level(self, index: int) -> np.ndarray:
+        if index == 0:
+            return self._base()
+        key = ("level", index)
+        if key in self._valid:
+            return self._storage[key]
+        previous = self._level(index - 1)
+        shape = ((previous.shape[0] + 1) // 2, (previous.shape[1] + 1) // 2)
+        dst = self._buffer(key, shape)
+        cv2.pyrDown(previous, dst=dst, dstsize=(shape[1], shape[0]))
+        self._valid.add(key)
+        return dst
+
+    def _buffer(self, key: Tuple, shape: Tuple[int, int]) -> np.ndarray:
+        buffer = self._storage.get(key)
+        if buffer is None or buffer.shape != shape:
+            buffer = np.empty(shape, dtype=np.uint8)
+            self._storage[key] = buffer
+        return buffer
@@ -2,126 +2,343 @@
 import cv2
 import cv2.aruco as aruco
 import numpy as np
+import threading
 import time
-from typing import Tuple, Optional, Dict, TYPE_CHECKING
+from typing import Tuple, Optional, Dict
+from src.board_dictionary import BoardDictionary
 from src.config import Config
+from src.corner_filter import CornerKalmanFilter
+from src.detector_profile import DetectorProfile
+from src.resolution_plan import ResolutionPlan
+from src.scale_controller import ProcessingScaleController
 
-if TYPE_CHECKING:
-    from AR_game import GameWindow
+
+class SharedMarkerDetection:
+    """A single full-frame marker detection per frame, shared by the boards of several players.
+
+    Boards request detections independently (and possibly concurrently), the detector only runs for the first
+    request of a frame and every other board gets the cached result. The detection resolution is tuned from the
+    markers of all boards.
+    """
+
+    def __init__(
+        self,
+        boards: list[list[int]],
+        *,
+        board_dictionary: Optional[BoardDictionary] = None,
+        resolution_plan: Optional[ResolutionPlan] = None,
+        detector_profile: Optional[str] = None,
+    ):
+        self.board_ids = [marker_id for board_ids in boards for marker_id in board_ids]
+        self.board_dictionary = board_dictionary or BoardDictionary(self.board_ids, Config.COMPACT_DICTIONARY)
+        self.detector = aruco.ArucoDetector(
+            self.board_dictionary.dictionary, DetectorProfile.create_parameters(detector_profile or Config.DETECTOR_PROFILE)
+        )
+        self.resolution_plan = resolution_plan
+        self.scale_controller = (
+            ProcessingScaleController(resolution_plan.marker_scale)
+            if resolution_plan is not None and Config.MARKER_AUTO_SCALE
+            else None
+        )
+        if self.scale_controller is not None:
+            resolution_plan.marker_scale = self.scale_controller.scale
+        self._lock = threading.Lock()
+        self._frame_key: Optional[Tuple[float, Tuple[int, ...]]] = None
+        self._detected_markers: Dict[int, np.ndarray] = {}
+
+    def detect(self, gray: np.ndarray, current_time: float) -> Dict[int, np.ndarray]:
+        """Corners of all board markers in the frame captured at `current_time`."""
+        with self._lock:
+            frame_key = (current_time, gray.shape)
+            if frame_key == self._frame_key:
+                return self._detected_markers
+
+            detected_markers, marker_ids, _ = self.detector.detectMarkers(gray)
+            self._detected_markers = {}
+            if marker_ids is not None:
+                self._detected_markers = {
+                    marker_id: marker[0]
+                    for marker, marker_id in zip(detected_markers, self.board_dictionary.to_board_ids(marker_ids))
+                    if marker_id in self.board_ids
+                }
+            self._frame_key = frame_key
+
+            if self.scale_controller is not None:
+                frame_scale = gray.shape[1] / self.resolution_plan.capture_size[0]
+                self.resolution_plan.marker_scale = self.scale_controller.update(
+                    self._detected_markers, frame_scale, len(self.board_ids)
+                )
+            return self._detected_markers
 
 
 class MarkerDetection:
-    def __init__(self, window: "GameWindow", board_ids: list[int], *, dictionary_type: int = aruco.DICT_6X6_250):
-        self.aruco_dict = aruco.getPredefinedDictionary(dictionary_type)
-        self.detector = aruco.ArucoDetector(self.aruco_dict, aruco.DetectorParameters())
-        self.marker_cache: Dict[int, Tuple[np.ndarray, float]] = {}
-        self.cache_timeout = 1
+    def __init__(
+        self,
+        board_ids: list[int],
+        *,
+        board_dictionary: Optional[BoardDictionary] = None,
+        resolution_plan: Optional[ResolutionPlan] = None,
+        detector_profile: Optional[str] = None,
+        shared_detection: Optional[SharedMarkerDetection] = None,
+    ):
+        """Tracks a single board. With `shared_detection` the board takes its markers from a detection shared with
+        other boards instead of running its own (ROI tracking and scale tuning are then left to the shared pass)."""
+        self.shared_detection = shared_detection
+        self.detector_profile = detector_profile or Config.DETECTOR_PROFILE
+        if shared_detection is not None:
+            self.board_dictionary = shared_detection.board_dictionary
+            self.detector = shared_detection.detector
+        else:
+            self.board_dictionary = board_dictionary or BoardDictionary(board_ids, Config.COMPACT_DICTIONARY)
+            self.detector = aruco.ArucoDetector(
+                self.board_dictionary.dictionary, DetectorProfile.create_parameters(self.detector_profile)
+            )
+        self.aruco_dict = self.board_dictionary.dictionary
         self.board_ids = board_ids
-        self.window = window
+        # Last measured corners indexed by board slot (position of the id in `board_ids`), monotonic timestamps
+        self._board_slots = {marker_id: slot for slot, marker_id in enumerate(board_ids)}
+        self.cached_corners = np.zeros((len(board_ids), 4, 2), dtype=np.float32)
+        self.cached_times = np.full(len(board_ids), -np.inf)
+        # Smoothed and predicted corners (slot * 4 + corner), markers are usable while their prediction is confident
+        self.corner_filter = CornerKalmanFilter(len(board_ids) * 4)
+        self._gray: Optional[np.ndarray] = None
+        # Full detections only run every n-th frame while the board is visible
+        # In between, marker corners are propagated with optical flow (or the last board is reused)
+        self.detection_interval = Config.MARKER_DETECTION_INTERVAL
+        self.optical_flow = Config.MARKER_OPTICAL_FLOW
+        self._frames_since_detection = 0
+        self._last_board_data: Tuple[Optional[np.ndarray], Optional[np.ndarray]] = (None, None)
+        self._previous_gray: Optional[np.ndarray] = None
+        self._flow_slots = np.empty(0, dtype=np.intp)
+        # ROI tracking searches only around cached markers, with a periodic full-frame scan
+        self.roi_tracking = Config.MARKER_ROI_TRACKING and shared_detection is None
+        self._frames_since_full_scan = 0
+        self._tracked_mask = np.zeros(len(board_ids), dtype=bool)
+        # Self-tuning detection resolution, written back into the resolution plan
+        self.resolution_plan = resolution_plan
+        self.scale_controller = (
+            ProcessingScaleController(resolution_plan.marker_scale)
+            if resolution_plan is not None and Config.MARKER_AUTO_SCALE and shared_detection is None
+            else None
+        )
+        if self.scale_controller is not None:
+            resolution_plan.marker_scale = self.scale_controller.scale
+        self._frame_shape: Optional[Tuple[int, ...]] = None
 
-    def get_inner_corner(self, marker_corners: np.ndarray, board_center: np.ndarray) -> np.ndarray:
-        """Get the inner corner of a marker (closest to board center)"""
-        distances = np.linalg.norm(marker_corners - board_center, axis=1)
-        return marker_corners[np.argmin(distances)]
+    def get_inner_corners(self, marker_corners: np.ndarray, board_center: np.ndarray) -> np.ndarray:
+        """Get the inner corner of each marker (closest to board center)"""
+        distances = np.linalg.norm(marker_corners - board_center, axis=2)
+        return marker_corners[np.arange(len(marker_corners)), np.argmin(distances, axis=1)]
 
     def get_cached_marker_count(self) -> int:
         """Get the count of recent cached markers."""
-        current_time = time.time()
+        return int(np.count_nonzero(time.monotonic() - self.cached_times < 5 / Config.UPDATE_RATE))
 
-        # Count only markers that haven't timed out
-        recent_markers = [
-            marker_id
-            for marker_id, (_, timestamp) in self.marker_cache.items()
-            if current_time - timestamp < 5 / Config.UPDATE_RATE
-        ]
-        return len(recent_markers)
+    # Corner pairs of a triangle and the corner opposite to each pair
+    _TRIANGLE_PAIRS = np.array([[0, 1], [0, 2], [1, 2]])
+    _TRIANGLE_OPPOSITE = np.array([2, 1, 0])
 
     def _extrapolate_fourth_corner(self, corners: np.ndarray) -> np.ndarray:
         """Extrapolate the fourth corner of a rectangle given three corners."""
-        # Find the diagonal (longest distance between corners)
-        distances = np.array([np.linalg.norm(corners[i] - corners[j]) for i in range(3) for j in range(i + 1, 3)])
-        max_dist_idx = np.argmax(distances)
-
-        # Convert flat index to corner indices
-        diagonal_pairs = [(i, j) for i in range(3) for j in range(i + 1, 3)]
-        diagonal_corners = diagonal_pairs[max_dist_idx]
-        right_angle_corner = next(i for i in range(3) if i not in diagonal_corners)
+        # The longest side of the triangle is the diagonal
+        distances = np.linalg.norm(corners[self._TRIANGLE_PAIRS[:, 0]] - corners[self._TRIANGLE_PAIRS[:, 1]], axis=1)
+        diagonal = np.argmax(distances)
 
         # Fourth point = diagonal_point1 + diagonal_point2 - right_angle_point
-        return corners[diagonal_corners[0]] + corners[diagonal_corners[1]] - corners[right_angle_corner]
+        first, second = self._TRIANGLE_PAIRS[diagonal]
+        return corners[first] + corners[second] - corners[self._TRIANGLE_OPPOSITE[diagonal]]
+
+    def _get_gray(self, frame: np.ndarray) -> np.ndarray:
+        """Luma frames are used as is, colour frames are converted into a reused buffer"""
+        if frame.ndim == 2:
+            return frame
+        if self._gray is None or self._gray.shape != frame.shape[:2]:
+            self._gray = np.empty(frame.shape[:2], dtype=np.uint8)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+
+    def _get_marker_data(self, detected_markers: Dict[int, np.ndarray], current_time: float) -> np.ndarray:
+        """Get filtered marker corners (n, 4, 2) at `current_time` from detection (or tracking) results or the filter's
+        predictions, limited to allowed marker IDs"""
+        # Update cache and filter with detected markers
+        slots = [self._board_slots[marker_id] for marker_id in detected_markers]
+        if slots:
+            self.cached_corners[slots] = list(detected_markers.values())
+            self.cached_times[slots] = current_time
+            point_indices = (np.array(slots)[:, None] * 4 + np.arange(4)).ravel()
+            self.corner_filter.update(point_indices, self.cached_corners[slots], current_time)
+        estimates = self.corner_filter.predict(current_time).reshape(-1, 4, 2).astype(np.float32)
+
+        # Try to use detected markers first (if enough)
+        if len(slots) >= 3:
+            return estimates[slots]
+
+        # Fall back to predicted markers if not enough fresh detections
+        confident = self._confident_slots(current_time)
+        if np.count_nonzero(confident) >= 3:
+            return estimates[confident]
+        return estimates[:0]
+
+    def _confident_slots(self, current_time: float) -> np.ndarray:
+        """Markers whose predicted corners are all still trustworthy."""
+        return self.corner_filter.confident(current_time).reshape(-1, 4).all(axis=1)
+
+    def _detect_markers(self, gray: np.ndarray, current_time: float) -> Dict[int, np.ndarray]:
+        """Detect board markers, restricted to regions around cached markers while ROI tracking."""
+        if self.shared_detection is not None:
+            detected_markers = self.shared_detection.detect(gray, current_time)
+            return {marker_id: corners for marker_id, corners in detected_markers.items() if marker_id in self._board_slots}
 
-    def _get_marker_data(self, frame: np.ndarray, current_time: float) -> list:
-        """Get marker data from detection or cache, limited to allowed marker IDs"""
-        board_ids = self.board_ids
+        rois = self._get_tracking_rois(gray.shape, current_time) if self.roi_tracking else None
+        if rois is not None and self._frames_since_full_scan < Config.MARKER_FULL_SCAN_INTERVAL:
+            detected_markers: Dict[int, np.ndarray] = {}
+            for x0, y0, x1, y1 in rois.values():
+                detected_markers.update(self._detect_in_region(gray[y0:y1, x0:x1], (x0, y0)))
+            # Fall back to a full scan as soon as a tracked marker is lost
+            if all(marker_id in detected_markers for marker_id in rois):
+                self._frames_since_full_scan += 1
+                return detected_markers
 
-        # Detect markers
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self._frames_since_full_scan = 0
+        detected_markers = self._detect_in_region(gray, (0, 0))
+        self._tracked_mask[:] = False
+        self._tracked_mask[[self._board_slots[marker_id] for marker_id in detected_markers]] = True
+        return detected_markers
+
+    def _detect_in_region(self, gray: np.ndarray, offset: Tuple[int, int]) -> Dict[int, np.ndarray]:
+        """Run the detector on a (sub) image and return board marker corners in full frame coordinates."""
         detected_markers, marker_ids, _ = self.detector.detectMarkers(gray)
+        if marker_ids is None:
+            return {}
+        offset_array = np.array(offset, dtype=np.float32)
+        return {
+            marker_id: marker[0] + offset_array
+            for marker, marker_id in zip(detected_markers, self.board_dictionary.to_board_ids(marker_ids))
+            if marker_id in self.board_ids
+        }
 
-        # Draw markers for debugging
-        if not self.window.is_full_board_visible() and detected_markers:
-            aruco.drawDetectedMarkers(frame, detected_markers, marker_ids)
+    def _get_tracking_rois(
+        self, frame_shape: Tuple[int, ...], current_time: float
+    ) -> Optional[Dict[int, Tuple[int, int, int, int]]]:
+        """Padded search regions (x0, y0, x1, y1) around markers found by the last full scan, None if too few are tracked."""
+        slots = np.flatnonzero(self._tracked_mask & self._confident_slots(current_time))
+        if len(slots) < 3:
+            return None
 
-        # Update cache with detected markers
-        if marker_ids is not None:
-            for i, marker in enumerate(detected_markers):
-                marker_id = int(marker_ids[i][0])
-                if marker_id in board_ids:
-                    marker_corners = marker[0]
-                    self.marker_cache[marker_id] = (marker_corners, current_time)
+        height, width = frame_shape[:2]
+        corners = self.corner_filter.predict(current_time).reshape(-1, 4, 2)[slots]
+        minimum, maximum = corners.min(axis=1), corners.max(axis=1)
+        padding = (maximum - minimum).max(axis=1, keepdims=True) * Config.MARKER_ROI_PADDING + 4
+        lower = np.maximum(minimum - padding, 0).astype(int)
+        upper = np.minimum(maximum + padding + 1, (width, height)).astype(int)
+        return {self.board_ids[slot]: (*lower[i], *upper[i]) for i, slot in enumerate(slots)}
 
-        # Try to use detected markers first (if enough)
-        marker_data = []
-        if marker_ids is not None:
-            for i, marker in enumerate(detected_markers):
-                marker_id = int(marker_ids[i][0])
-                if marker_id in board_ids:
-                    corners = marker[0]
-                    center = np.mean(corners, axis=0)
-                    marker_data.append((center, corners))
-            if len(marker_data) >= 3:
-                return marker_data
-
-        # Fall back to cached markers if not enough fresh detections
-        cached_marker_data = []
-        for marker_id, (cached_corners, timestamp) in self.marker_cache.items():
-            if marker_id in board_ids:
-                # Only use recent cached markers
-                if current_time - timestamp < self.cache_timeout:
-                    center = np.mean(cached_corners, axis=0)
-                    cached_marker_data.append((center, cached_corners))
-
-        # Return cached data only if we have enough markers
-        return cached_marker_data if len(cached_marker_data) >= 3 else []
-
-    def get_board_data(self, frame: np.ndarray) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
-        marker_data = self._get_marker_data(frame, time.time())
-
-        if len(marker_data) < 3:
+    def _track_markers(self, gray: np.ndarray) -> Optional[Dict[int, np.ndarray]]:
+        """Propagate the corners of the markers seen in the previous frame with pyramidal Lucas-Kanade optical flow.
+
+        Returns None if tracking is not possible or its forward-backward error is too high.
+        """
+        if self._previous_gray is None or self._previous_gray.shape != gray.shape or len(self._flow_slots) < 3:
+            return None
+
+        previous_points = self.cached_corners[self._flow_slots].reshape(-1, 1, 2)
+        flow_parameters = dict(winSize=(21, 21), maxLevel=3)
+        points, status, _ = cv2.calcOpticalFlowPyrLK(self._previous_gray, gray, previous_points, None, **flow_parameters)
+        back_points, back_status, _ = cv2.calcOpticalFlowPyrLK(
+            gray, self._previous_gray, points, None, **flow_parameters
+        )
+        tracking_error = np.linalg.norm((back_points - previous_points).reshape(-1, 2), axis=1)
+        if not status.all() or not back_status.all() or tracking_error.max() > Config.MARKER_FLOW_MAX_ERROR:
+            return None
+
+        points = points.reshape(-1, 4, 2)
+        return {self.board_ids[slot]: points[i] for i, slot in enumerate(self._flow_slots)}
+
+    def _rescale_cache(self, frame_shape: Tuple[int, ...]):
+        """Move cached marker positions into the coordinates of a frame with a different detection resolution."""
+        if self._frame_shape is not None and self._frame_shape != frame_shape:
+            ratio = np.array(
+                [frame_shape[1] / self._frame_shape[1], frame_shape[0] / self._frame_shape[0]], dtype=np.float32
+            )
+            self.cached_corners *= ratio
+            self.corner_filter.rescale(ratio)
+            # The board and the flow reference are in the old coordinates, force a new detection
+            self._last_board_data = (None, None)
+            self._previous_gray = None
+        self._frame_shape = frame_shape
+
+    def get_current_scale(self) -> float:
+        """Current marker detection scale relative to the capture resolution."""
+        if self.scale_controller is not None:
+            return self.scale_controller.scale
+        return self.resolution_plan.marker_scale if self.resolution_plan is not None else Config.PROCESSING_SCALE
+
+    def get_board_data(
+        self, frame: np.ndarray, timestamp: Optional[float] = None
+    ) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Detect the board in a frame at marker resolution.
+
+        Returned coordinates are relative to the given frame, filtered and predicted to `timestamp` (monotonic
+        capture time of the frame, defaults to now). With auto scaling the next frame is expected at the
+        resolution plan's updated marker size.
+        """
+        current_time = time.monotonic() if timestamp is None else timestamp
+        gray = self._get_gray(frame)
+        self._rescale_cache(gray.shape)
+        detected_markers = None
+
+        # Between full detections, track the markers or predict the board forward
+        if self._last_board_data[0] is not None and self._frames_since_detection < self.detection_interval - 1:
+            if self.optical_flow:
+                detected_markers = self._track_markers(gray)
+            else:
+                self._frames_since_detection += 1
+                self._last_board_data = self._assemble_board(self._get_marker_data({}, current_time))
+                return self._last_board_data
+
+        if detected_markers is None:
+            detected_markers = self._detect_markers(gray, current_time)
+            self._frames_since_detection = 0
+            if self.scale_controller is not None:
+                frame_scale = gray.shape[1] / self.resolution_plan.capture_size[0]
+                self.resolution_plan.marker_scale = self.scale_controller.update(
+                    detected_markers, frame_scale, len(self.board_ids)
+                )
+        else:
+            self._frames_since_detection += 1
+
+        # Keep the frame for optical flow, the caller may reuse its buffer
+        if self.optical_flow:
+            if self._previous_gray is None or self._previous_gray.shape != gray.shape:
+                self._previous_gray = np.empty_like(gray)
+            np.copyto(self._previous_gray, gray)
+            self._flow_slots = np.array([self._board_slots[marker_id] for marker_id in detected_markers], dtype=np.intp)
+
+        self._last_board_data = self._assemble_board(self._get_marker_data(detected_markers, current_time))
+        return self._last_board_data
+
+    def _assemble_board(self, marker_corners: np.ndarray) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
+        """Order the inner corners of 3 or 4 board markers clockwise, extrapolating the 4th if needed."""
+        if len(marker_corners) < 3:
             return None, None
 
-        centers = np.array([center for center, _ in marker_data])
-        board_center = np.mean(centers, axis=0)
+        centers = marker_corners.mean(axis=1)
+        board_center = centers.mean(axis=0)
 
         # Sort markers by y-coordinate, then arrange properly
         y_sorted_indices = np.argsort(centers[:, 1])
 
-        if len(marker_data) == 4:
+        if len(marker_corners) == 4:
             # Clockwise order: top-left, top-right, bottom-right, bottom-left
-            top_indices = sorted(y_sorted_indices[:2], key=lambda i: centers[i][0])
-            bottom_indices = sorted(y_sorted_indices[2:], key=lambda i: centers[i][0])
-            ordered_indices = [top_indices[0], top_indices[1], bottom_indices[1], bottom_indices[0]]
+            top_indices = y_sorted_indices[:2][np.argsort(centers[y_sorted_indices[:2], 0])]
+            bottom_indices = y_sorted_indices[2:][np.argsort(-centers[y_sorted_indices[2:], 0])]
+            ordered_indices = np.concatenate([top_indices, bottom_indices])
         else:
             ordered_indices = y_sorted_indices[:3]
 
-        # Get inner corners
-        inner_corners = np.array(
-            [self.get_inner_corner(marker_data[idx][1], board_center) for idx in ordered_indices], dtype=np.float32
-        )
+        inner_corners = self.get_inner_corners(marker_corners[ordered_indices], board_center).astype(np.float32)
 
         # Extrapolate fourth corner if only 3 markers
-        if len(marker_data) == 3:
-            fourth_corner = self._extrapolate_fourth_corner(inner_corners)
-            inner_corners = np.vstack([inner_corners, fourth_corner])
+        if len(ordered_indices) == 3:
+            inner_corners = np.vstack([inner_corners, self._extrapolate_fourth_corner(inner_corners)])
 
         return inner_corners, board_center
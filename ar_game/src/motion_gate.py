@@ -0,0 +1,69 @@
+from typing import Optional
+import cv2
+import numpy as np
+from src.config import Config
+from src.resolution_plan import ResolutionPlan
+
+
+class MotionGate:
+    """Skips the fingertip detection while nothing moves on an empty board.
+
+    Every frame a tiny copy of the board is warped from the detection frame. The board region is first shrunk with
+    area averaging to about the size of the copy, so the warp does not point sample (alias) the frame and sensor
+    noise averages out. After a detection without a hand that copy becomes the idle board, later frames are only
+    analysed once enough pixels differ from it, so a hand entering slowly still opens the gate. A full detection
+    also runs every `Config.MOTION_GATE_MAX_SKIPPED` frames.
+    """
+
+    def __init__(self, resolution_plan: ResolutionPlan):
+        display_width, display_height = resolution_plan.display_size
+        self.size = (
+            max(1, int(display_width * Config.MOTION_GATE_SCALE)),
+            max(1, int(display_height * Config.MOTION_GATE_SCALE)),
+        )
+        self._display_to_gate = np.diag([self.size[0] / display_width, self.size[1] / display_height, 1])
+        self._gate_quad = np.float32([[0, 0], [self.size[0], 0], [self.size[0], self.size[1]], [0, self.size[1]]])
+        # Tiny board of the current frame and of the last detection that found no hand
+        self._board: Optional[np.ndarray] = None
+        self._idle_board: Optional[np.ndarray] = None
+        self.skipped_frames = 0
+
+    def is_static(self, frame: np.ndarray, frame_to_display: np.ndarray) -> bool:
+        """Warp the tiny board from a frame (luma or BGR), True if the detection can be skipped on it."""
+        self._board = self._sample_board(frame, self._display_to_gate @ frame_to_display)
+        if self._idle_board is None or self.skipped_frames >= Config.MOTION_GATE_MAX_SKIPPED:
+            return False
+        difference = cv2.absdiff(self._board, self._idle_board)
+        changed = np.count_nonzero(difference > Config.MOTION_GATE_PIXEL_THRESHOLD)
+        if changed > Config.MOTION_GATE_THRESHOLD * difference.size:
+            return False
+        self.skipped_frames += 1
+        return True
+
+    def _sample_board(self, frame: np.ndarray, frame_to_gate: np.ndarray) -> np.ndarray:
+        """Tiny luma board, warped from an area averaged copy of the board region of the frame."""
+        # Board region in frame pixels
+        quad = cv2.perspectiveTransform(self._gate_quad.reshape(-1, 1, 2), np.linalg.inv(frame_to_gate))
+        x, y, width, height = cv2.boundingRect(quad)
+        # Shrink by a whole factor to about the gate resolution, cropped on multiples of the factor so the averaging
+        # grid stays put while the board jitters
+        factor = max(1, int(min(width / self.size[0], height / self.size[1])))
+        x0, y0 = max(x - factor, 0) // factor * factor, max(y - factor, 0) // factor * factor
+        x1 = x0 + (min(x + width + factor, frame.shape[1]) - x0) // factor * factor
+        y1 = y0 + (min(y + height + factor, frame.shape[0]) - y0) // factor * factor
+        if x1 <= x0 or y1 <= y0:
+            return np.zeros((self.size[1], self.size[0]), dtype=np.uint8)
+        region = frame[y0:y1, x0:x1]
+        if region.ndim == 3:
+            region = cv2.cvtColor(region, cv2.COLOR_BGR2GRAY)
+        small = cv2.resize(region, ((x1 - x0) // factor, (y1 - y0) // factor), interpolation=cv2.INTER_AREA)
+        # Centre of a small pixel in frame pixels
+        offset = (factor - 1) / 2
+        small_to_frame = np.array([[factor, 0, x0 + offset], [0, factor, y0 + offset], [0, 0, 1]], dtype=np.float64)
+        return cv2.warpPerspective(small, frame_to_gate @ small_to_frame, self.size, borderMode=cv2.BORDER_REPLICATE)
+
+    def update(self, hand_found: bool):
+        """Record the result of a full detection on the last frame passed to `is_static`."""
+        self.skipped_frames = 0
+        # The gate only closes on an empty board, a resting hand is still detected on every frame
+        self._idle_board = None if hand_found else self._board
@@ -1,71 +1,367 @@
 import cv2
 import numpy as np
-from typing import Optional, Sequence, Tuple
+from typing import Callable, List, Optional, Sequence, Tuple
 from src.config import Config
+from src.resolution_plan import ResolutionPlan
+from src.background_model import BackgroundModel
+from src.auto_threshold import AutoThreshold
+from src.fingertip_backend import create_backend
+from src.fingertip_tracker import Fingertip, FingertipTracker
+from src.motion_gate import MotionGate
 from cv2.typing import MatLike
 
 
 class ObjectDetection:
-    def __init__(self):
+    def __init__(self, resolution_plan: Optional[ResolutionPlan] = None, backend: Optional[str] = None):
         # Kernel for morphological operations
         self.kernel = np.ones((5, 5), np.uint8)
+        self.resolution_plan = resolution_plan or ResolutionPlan.from_config()
+        # Segmentation and candidate extraction, see `src.fingertip_backend`
+        self.backend = create_backend(backend)
+        # Scratch buffers owned by the detection, reallocated only if the frame size changes
+        self._gray: Optional[np.ndarray] = None
+        self._thresh: Optional[np.ndarray] = None
+        # Bounding box (x0, y0, x1, y1) of the tracked hands and its change over the last frame, in frame coordinates
+        self._hand_box: Optional[np.ndarray] = None
+        self._hand_velocity = np.zeros(4)
+        self._frames_since_full_scan = 0
+        # Keeps the IDs of the fingertips stable across frames
+        self.tracker = FingertipTracker()
+        # Skips the detection on frames where nothing moves on the empty board
+        self.motion_gate = MotionGate(self.resolution_plan) if Config.MOTION_GATE else None
+        # Learned reference of the empty board, the global threshold is used until it is ready
+        self.background_model = BackgroundModel(self.resolution_plan) if Config.BACKGROUND_MODEL else None
+        # Thresholds of the intensity and the background difference segmentation, tuned online
+        self.intensity_threshold = AutoThreshold(Config.CONTOUR_SENSITIVITY)
+        self.background_threshold = AutoThreshold(Config.BACKGROUND_THRESHOLD)
+        self.using_background = False
 
-    def detect_object(self, frame: np.ndarray) -> Tuple[Optional[Tuple[float, float]], Optional[Tuple[float, float]]]:
+    def detect_object(
+        self, frame: np.ndarray, overlay: Optional[np.ndarray] = None, learn_background: bool = False
+    ) -> List[Fingertip]:
         """
-        Detect the object in the frame and return its highest and lowest point coordinates.
-        Returns a tuple of (highest_point, lowest_point) where each point is (x, y) or None if no object is detected.
+        Detect the hands in the frame and return the fingertip (highest point) and lowest point of each of them.
+        The frame (luma or BGR, BGR for colour backends) is expected at fingertip resolution, returned points are mapped into display coordinates.
+        Returns up to `Config.MAX_FINGERTIPS` fingertips with track IDs, the highest one first, an empty list if no object is detected.
+        Debug visuals are drawn onto `overlay` (display resolution) if given, otherwise onto the frame itself.
+        `learn_background` learns the background model from scratch (during the countdown).
         """
-        # Pre process frame
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        _, thresh = cv2.threshold(gray, Config.CONTOUR_SENSITIVITY, 255, cv2.THRESH_BINARY_INV)
-
-        # Find contours
-        contours, _ = cv2.findContours(thresh, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_NONE)
-
-        # Find the contour with the highest point and get its lowest point
-        highest_point_coords, contour = self._find_highest_point(contours)
-        lowest_point_coords = self._find_lowest_point(contour)
-
-        if Config.DEBUG and contour is not None:
-            # cv2.imshow("Thresholded Frame", thresh)
-            cv2.drawContours(frame, [contour], 0, (0, 0, 255, 255), 3)
-            cv2.circle(
-                frame,
-                (int(highest_point_coords[0]), int(Config.WINDOW_HEIGHT - highest_point_coords[1])),
-                50,
-                (255, 0, 0),
-                15,
-            )
-            cv2.circle(
-                frame,
-                (int(lowest_point_coords[0]), int(Config.WINDOW_HEIGHT - lowest_point_coords[1])),
-                50,
-                (255, 0, 0),
-                15,
-            )
-            cv2.line(
-                frame,
-                (int(highest_point_coords[0]), int(Config.WINDOW_HEIGHT - highest_point_coords[1])),
-                (int(lowest_point_coords[0]), int(Config.WINDOW_HEIGHT - lowest_point_coords[1])),
-                (0, 255, 0),
-                5,
-            )
-
-        return (highest_point_coords, lowest_point_coords)
-
-    def _find_lowest_point(self, contour: Optional[MatLike]) -> Optional[Tuple[float, float]]:
-        """Find the lowest centered point in the contour."""
-        if contour is None or len(contour) == 0:
+        # Contour sizes are configured in display pixels, scale them to the detection resolution
+        display_to_frame = frame.shape[1] / self.resolution_plan.display_size[0]
+        min_contour_area = Config.MIN_CONTOUR_AREA * display_to_frame**2
+        frame_height, frame_width = frame.shape[:2]
+        bounds = (0, 0, frame_width, frame_height)
+        display_width, display_height = self.resolution_plan.display_size
+        frame_to_display = np.diag([display_width / frame_width, display_height / frame_height, 1])
+        if self._skip_static_frame(frame, frame_to_display, learn_background):
+            return self.tracker.update([])
+
+        def select(contours: Sequence[MatLike]):
+            # Find the contours with the highest points and get their lowest points
+            found = [
+                (highest_point_coords, self._find_lowest_point(contour, frame_height, 20 * display_to_frame), contour)
+                for highest_point_coords, contour in self._find_highest_points(contours, frame_height, min_contour_area)
+            ]
+            return found, _indices_of(contours, [contour for _, _, contour in found])
+
+        found = self._track_contours(
+            frame, bounds, select, reference=self._background_reference(frame_to_display, bounds), min_area=min_contour_area
+        )
+        self._update_background(frame, frame_to_display, learn_background)
+
+        # Map results into display coordinates
+        fingertips = self.tracker.update(
+            [
+                Fingertip(
+                    self.resolution_plan.fingertip_to_display(highest_point_coords),
+                    self.resolution_plan.fingertip_to_display(lowest_point_coords),
+                )
+                for highest_point_coords, lowest_point_coords, _ in found
+            ]
+        )
+        if self.motion_gate is not None:
+            self.motion_gate.update(bool(fingertips))
+
+        if Config.DEBUG and found:
+            if overlay is None:
+                overlay = cv2.resize(frame, self.resolution_plan.display_size)
+            for fingertip, (_, _, contour) in zip(fingertips, found):
+                display_contour = (contour * (overlay.shape[1] / frame.shape[1])).astype(np.int32)
+                self._draw_debug(overlay, display_contour, fingertip)
+
+        return fingertips
+
+    def detect_object_in_camera(
+        self,
+        frame: np.ndarray,
+        capture_to_display: np.ndarray,
+        overlay: Optional[np.ndarray] = None,
+        learn_background: bool = False,
+    ) -> List[Fingertip]:
+        """
+        Same as `detect_object`, but on the downscaled camera frame (luma, BGR for colour backends) instead of a warped board.
+        Only pixels inside the board quad are thresholded. The contours are mapped onto the board with the board
+        homography `capture_to_display` (mirror included), so no image has to be warped for the detection.
+        """
+        capture_width, capture_height = self.resolution_plan.capture_size
+        frame_height, frame_width = frame.shape[:2]
+        frame_to_display = capture_to_display @ np.diag([capture_width / frame_width, capture_height / frame_height, 1])
+
+        # Board quad in frame coordinates, taken from the homography so mask and mapping always agree
+        display_width, display_height = self.resolution_plan.display_size
+        display_quad = np.float32([[0, 0], [display_width, 0], [display_width, display_height], [0, display_height]])
+        quad = cv2.perspectiveTransform(display_quad.reshape(-1, 1, 2), np.linalg.inv(frame_to_display))
+        x, y, width, height = cv2.boundingRect(quad)
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + width, frame_width), min(y + height, frame_height)
+        if x1 <= x0 or y1 <= y0:
+            self._reset_track()
+            return self.tracker.update([])
+        if self._skip_static_frame(frame, frame_to_display, learn_background):
+            return self.tracker.update([])
+
+        def select(contours: Sequence[MatLike]):
+            if len(contours) == 0:
+                return [], []
+            # Map all contour points onto the board in one call
+            points = cv2.perspectiveTransform(np.concatenate(contours).astype(np.float32), frame_to_display)
+            display_contours = np.split(points, np.cumsum([len(contour) for contour in contours])[:-1])
+            # Same selection as on the warped board, directly in display pixels
+            found = [
+                (highest_point_coords, self._find_lowest_point(contour, display_height), contour)
+                for highest_point_coords, contour in self._find_highest_points(
+                    display_contours, display_height, Config.MIN_CONTOUR_AREA
+                )
+            ]
+            return found, _indices_of(display_contours, [contour for _, _, contour in found])
+
+        # Rasterize the board once for the whole bounding box, search windows use views of it
+        mask = np.zeros((y1 - y0, x1 - x0), dtype=np.uint8)
+        cv2.fillPoly(mask, [np.round(quad - (x0, y0)).astype(np.int32)], 255)
+        bounds = (x0, y0, x1, y1)
+        # Lower bound of the contour area in frame pixels, the board scale varies with the perspective
+        min_area = 0.5 * Config.MIN_CONTOUR_AREA * cv2.contourArea(quad) / (display_width * display_height)
+        found = self._track_contours(
+            frame, bounds, select, mask, self._background_reference(frame_to_display, bounds), min_area
+        )
+        self._update_background(frame, frame_to_display, learn_background)
+        fingertips = self.tracker.update([Fingertip(high, low) for high, low, _ in found])
+        if self.motion_gate is not None:
+            self.motion_gate.update(bool(fingertips))
+
+        if Config.DEBUG and overlay is not None:
+            for fingertip, (_, _, contour) in zip(fingertips, found):
+                self._draw_debug(overlay, contour.astype(np.int32), fingertip)
+
+        return fingertips
+
+    def _skip_static_frame(self, frame: np.ndarray, frame_to_display: np.ndarray, learn_background: bool) -> bool:
+        """Whether the motion gate skips the detection on this frame, the background model still adapts on skipped frames."""
+        if self.motion_gate is None:
+            return False
+        # The countdown learns the background from fully analysed frames
+        if not self.motion_gate.is_static(frame, frame_to_display) or learn_background:
+            return False
+        self._update_background(frame, frame_to_display, learn_background)
+        return True
+
+    def _track_contours(
+        self,
+        frame: np.ndarray,
+        bounds: Tuple[int, int, int, int],
+        select: Callable[[Sequence[MatLike]], Tuple[list, List[int]]],
+        mask: Optional[np.ndarray] = None,
+        reference: Optional[np.ndarray] = None,
+        min_area: float = 0.0,
+    ) -> list:
+        """Find contours in `bounds` (x0, y0, x1, y1) of the frame, masked by `mask` (bounds sized) if given, and pick the hands.
+        The hand is segmented against the background `reference` (bounds sized) if given, backends may skip
+        blobs smaller than `min_area` frame pixels.
+
+        `select` returns its result and the indices of the chosen contours. While hands are tracked only a window
+        around them is searched. A full scan of `bounds` runs periodically (a new hand outside of the window is found
+        there), when all hands are lost or when one of them reaches the border of the window (its contour would be cut off).
+        """
+        self._sample_threshold(frame, bounds, mask, reference)
+        window = self._search_window(bounds)
+        if window is not None:
+            contours = self._find_contours(frame, window, bounds, mask, reference, min_area)
+            result, indices = select(contours)
+            if indices and not any(_touches_window(contours[index], window, bounds) for index in indices):
+                self._frames_since_full_scan += 1
+                self._update_track([contours[index] for index in indices])
+                return result
+
+        self._frames_since_full_scan = 0
+        contours = self._find_contours(frame, bounds, bounds, mask, reference, min_area)
+        result, indices = select(contours)
+        if not indices:
+            self._reset_track()
+        else:
+            self._update_track([contours[index] for index in indices])
+        return result
+
+    def _find_contours(
+        self,
+        frame: np.ndarray,
+        window: Tuple[int, int, int, int],
+        bounds: Tuple[int, int, int, int],
+        mask: Optional[np.ndarray] = None,
+        reference: Optional[np.ndarray] = None,
+        min_area: float = 0.0,
+    ) -> Sequence[MatLike]:
+        """Segment a window of the frame with the backend and return its candidate contours in frame coordinates."""
+        # Scratch buffers cover the whole frame, a window is processed in a view of them
+        if self._thresh is None or self._thresh.shape != frame.shape[:2]:
+            self._gray = np.empty(frame.shape[:2], dtype=np.uint8)
+            self._thresh = np.empty(frame.shape[:2], dtype=np.uint8)
+        x0, y0, x1, y1 = window
+        # Pre process frame, luma frames are segmented directly
+        image = frame[y0:y1, x0:x1]
+        if frame.ndim == 3 and not self.backend.needs_color:
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._gray[y0:y1, x0:x1])
+        thresh = self._thresh[y0:y1, x0:x1]
+        bounds_view = (slice(y0 - bounds[1], y1 - bounds[1]), slice(x0 - bounds[0], x1 - bounds[0]))
+        if reference is not None:
+            self.backend.segment(image, reference[bounds_view], self.background_threshold.value, thresh)
+        else:
+            self.backend.segment(image, None, self.intensity_threshold.value, thresh)
+        if mask is not None:
+            # Mask out everything outside of the board
+            cv2.bitwise_and(thresh, mask[bounds_view], dst=thresh)
+        return self.backend.extract(thresh, (x0, y0), min_area)
+
+    def _sample_threshold(
+        self,
+        frame: np.ndarray,
+        bounds: Tuple[int, int, int, int],
+        mask: Optional[np.ndarray],
+        reference: Optional[np.ndarray],
+    ):
+        """Every few frames feed a subsampled view of the image that is about to be thresholded into its auto threshold."""
+        self.using_background = reference is not None
+        if not self.backend.uses_threshold:
+            return
+        threshold = self.background_threshold if self.using_background else self.intensity_threshold
+        if not Config.AUTO_THRESHOLD or not threshold.due():
+            return
+        step = Config.AUTO_THRESHOLD_SUBSAMPLE
+        x0, y0, x1, y1 = bounds
+        gray = np.ascontiguousarray(frame[y0:y1:step, x0:x1:step])
+        if gray.ndim == 3:
+            gray = cv2.cvtColor(gray, cv2.COLOR_BGR2GRAY)
+        image = cv2.subtract(np.ascontiguousarray(reference[::step, ::step]), gray) if self.using_background else gray
+        threshold.update(image, None if mask is None else np.ascontiguousarray(mask[::step, ::step]))
+
+    def get_threshold_text(self) -> str:
+        """Threshold currently used to segment the hand, for the debug overlay."""
+        if not self.backend.uses_threshold:
+            return f"none ({self.backend.NAME})"
+        if self.using_background:
+            return f"{self.background_threshold.value} (background difference)"
+        return f"{self.intensity_threshold.value} (intensity)"
+
+    def _background_reference(
+        self, frame_to_display: np.ndarray, bounds: Tuple[int, int, int, int]
+    ) -> Optional[np.ndarray]:
+        if self.background_model is None or not self.backend.uses_threshold:
+            return None
+        return self.background_model.aligned_reference(frame_to_display, bounds)
+
+    def reset_background(self):
+        """Learn the background model from scratch on the next frames, called when the board is found."""
+        if self.background_model is not None:
+            self.background_model.reset()
+
+    def _update_background(self, frame: np.ndarray, frame_to_display: np.ndarray, learn_background: bool):
+        if self.background_model is None or not self.backend.uses_threshold:
+            return
+        # Exclude the hand with the same tuned threshold the detection uses
+        threshold = self.background_threshold if self.background_model.ready else self.intensity_threshold
+        self.background_model.update(frame, frame_to_display, learn_background, threshold.value)
+
+    def _search_window(self, bounds: Tuple[int, int, int, int]) -> Optional[Tuple[int, int, int, int]]:
+        """Padded window around the last bounding box of the hands, extended by its velocity. None if a full scan is due."""
+        if (
+            not Config.FINGERTIP_ROI_TRACKING
+            or self._hand_box is None
+            or self._frames_since_full_scan >= Config.FINGERTIP_FULL_SCAN_INTERVAL
+        ):
+            return None
+        # Cover the last box and the box moved on by one frame of velocity
+        predicted_box = self._hand_box + self._hand_velocity
+        padding = Config.FINGERTIP_ROI_PADDING * max(bounds[2] - bounds[0], bounds[3] - bounds[1])
+        lower = np.minimum(self._hand_box[:2], predicted_box[:2]) - padding
+        upper = np.maximum(self._hand_box[2:], predicted_box[2:]) + padding
+        x0, y0 = np.maximum(lower, bounds[:2]).astype(int)
+        x1, y1 = np.minimum(np.ceil(upper), bounds[2:]).astype(int)
+        if x1 <= x0 or y1 <= y0:
             return None
+        return (x0, y0, x1, y1)
+
+    def _update_track(self, contours: List[MatLike]):
+        # A single box around all tracked hands
+        x, y, width, height = cv2.boundingRect(np.concatenate(contours))
+        hand_box = np.array([x, y, x + width, y + height], dtype=np.float64)
+        self._hand_velocity = hand_box - self._hand_box if self._hand_box is not None else np.zeros(4)
+        self._hand_box = hand_box
+
+    def _reset_track(self):
+        self._hand_box = None
+        self._hand_velocity = np.zeros(4)
 
-        # Y range threshold for points to be considered at the "lowest" level
-        Y_RANGE_THRESHOLD = 20
+    def _draw_debug(
+        self,
+        overlay: np.ndarray,
+        display_contour: np.ndarray,
+        fingertip: Fingertip,
+    ):
+        """Draw a selected contour, its fingertip points and track ID onto a display sized image."""
+        highest_point_coords, lowest_point_coords = fingertip.high, fingertip.low
+        cv2.drawContours(overlay, [display_contour], 0, (0, 0, 255, 255), 3)
+        cv2.circle(
+            overlay,
+            (int(highest_point_coords[0]), int(Config.WINDOW_HEIGHT - highest_point_coords[1])),
+            50,
+            (255, 0, 0),
+            15,
+        )
+        cv2.circle(
+            overlay,
+            (int(lowest_point_coords[0]), int(Config.WINDOW_HEIGHT - lowest_point_coords[1])),
+            50,
+            (255, 0, 0),
+            15,
+        )
+        cv2.line(
+            overlay,
+            (int(highest_point_coords[0]), int(Config.WINDOW_HEIGHT - highest_point_coords[1])),
+            (int(lowest_point_coords[0]), int(Config.WINDOW_HEIGHT - lowest_point_coords[1])),
+            (0, 255, 0),
+            5,
+        )
+        cv2.putText(
+            overlay,
+            str(fingertip.track_id),
+            (int(highest_point_coords[0]) + 55, int(Config.WINDOW_HEIGHT - highest_point_coords[1])),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            1.5,
+            (255, 0, 0),
+            3,
+        )
+
+    def _find_lowest_point(
+        self, contour: Optional[MatLike], frame_height: int, y_range_threshold: float = 20
+    ) -> Optional[Tuple[float, float]]:
+        """Find the lowest centered point in the contour. `y_range_threshold` is the range for points to be considered at the "lowest" level."""
+        if contour is None or len(contour) == 0:
+            return None
 
         contour_points = contour.reshape(-1, 2)
         highest_y = np.max(contour_points[:, 1])
 
-        # Find all points within Y_RANGE_THRESHOLD of the lowest point
-        lowest_points_indices = np.where(contour_points[:, 1] >= highest_y - Y_RANGE_THRESHOLD)[0]
+        # Find all points within y_range_threshold of the lowest point
+        lowest_points_indices = np.where(contour_points[:, 1] >= highest_y - y_range_threshold)[0]
         lowest_points = contour_points[lowest_points_indices]
 
         if len(lowest_points) == 0:
@@ -79,44 +375,40 @@ class ObjectDetection:
         x_at_median = lowest_points[closest_idx, 0]
         y_at_median = lowest_points[closest_idx, 1]
 
-        lowest_point_coords = (float(x_at_median), float(Config.WINDOW_HEIGHT - y_at_median))
+        lowest_point_coords = (float(x_at_median), float(frame_height - y_at_median))
         return lowest_point_coords
 
-    def _find_highest_point(
-        self, contours: Sequence[MatLike]
-    ) -> Tuple[Optional[Tuple[float, float]], Optional[MatLike]]:
-        """Find the contour with the highest point."""
-        best_contour = None
-        lowest_y = float("inf")
-        highest_point_coords = None
-
+    def _find_highest_points(
+        self, contours: Sequence[MatLike], frame_height: int, min_contour_area: float = Config.MIN_CONTOUR_AREA
+    ) -> List[Tuple[Tuple[float, float], MatLike]]:
+        """Find the highest point of every large enough contour, at most `Config.MAX_FINGERTIPS` contours with the highest points first."""
+        candidates = []
         for contour in contours:
             # Filter small contours
-            if cv2.contourArea(contour) < Config.MIN_CONTOUR_AREA:
+            if cv2.contourArea(contour) < min_contour_area:
                 continue
 
-            # Find the point with the lowest y value in this contour
+            # Find the point with the lowest y value in this contour (the first one if there are several)
             contour_points = contour.reshape(-1, 2)
-            min_y_in_contour = np.min(contour_points[:, 1])
-
-            # Update highest point (lowest y-value)
-            if min_y_in_contour < lowest_y:
-                lowest_y = min_y_in_contour
-                # Find the x coordinate at this y-value
-                min_y_indices = np.where(contour_points[:, 1] == min_y_in_contour)[0]
-                x_at_min_y = contour_points[min_y_indices[0], 0]
-                highest_point_coords = (float(x_at_min_y), float(Config.WINDOW_HEIGHT - lowest_y))
-                best_contour = contour  # Save the contour with the highest point
-
-        # Set the highest point coordinates if a best contour was found
-        if best_contour is not None:
-            # Extract the contour points
-            contour_points = best_contour.reshape(-1, 2)
-            # Find the minimum y value (highest point in screen coordinates)
-            lowest_y = np.min(contour_points[:, 1])
-            # Find the x coordinate at this y-value
-            min_y_indices = np.where(contour_points[:, 1] == lowest_y)[0]
-            x_at_min_y = contour_points[min_y_indices[0], 0]
-            highest_point_coords = (float(x_at_min_y), float(Config.WINDOW_HEIGHT - lowest_y))
-
-        return highest_point_coords, best_contour
+            x_at_min_y, min_y_in_contour = contour_points[np.argmin(contour_points[:, 1])]
+            candidates.append(((float(x_at_min_y), float(frame_height - min_y_in_contour)), contour))
+
+        # Highest point first (lowest y-value), the sort is stable so ties keep the contour order
+        candidates.sort(key=lambda candidate: -candidate[0][1])
+        return candidates[: Config.MAX_FINGERTIPS]
+
+
+def _indices_of(contours: Sequence[MatLike], selected: Sequence[MatLike]) -> List[int]:
+    """Indices of the selected contour objects."""
+    return [index for index, candidate in enumerate(contours) if any(candidate is contour for contour in selected)]
+
+
+def _touches_window(contour: MatLike, window: Tuple[int, int, int, int], bounds: Tuple[int, int, int, int]) -> bool:
+    """Whether the contour reaches an edge of the window that is not also an edge of the searched bounds."""
+    x, y, width, height = cv2.boundingRect(contour)
+    return (
+        (x <= window[0] and window[0] > bounds[0])
+        or (y <= window[1] and window[1] > bounds[1])
+        or (x + width >= window[2] and window[2] < bounds[2])
+        or (y + height >= window[3] and window[3] < bounds[3])
+    )
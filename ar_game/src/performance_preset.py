@@ -0,0 +1,216 @@
+import json
+import os
+import platform
+import time
+from typing import Dict, Optional, Tuple
+import cv2
+import cv2.aruco as aruco
+import numpy as np
+from src.config import Config
+from src.detector_profile import DetectorProfile
+from src.gray_pyramid import GrayPyramid
+from src.object_detection import ObjectDetection
+from src.perspective_transformer import PerspectiveTransformer
+from src.resolution_plan import ResolutionPlan
+
+
+class PerformancePreset:
+    def __init__(
+        self,
+        name: str,
+        capture_size: Tuple[int, int],
+        processing_scale: float,
+        fingertip_scale: float,
+        detection_interval: int,
+    ):
+        self.name = name
+        self.capture_size = capture_size
+        self.processing_scale = processing_scale
+        self.fingertip_scale = fingertip_scale
+        self.detection_interval = detection_interval
+
+    def apply(self):
+        """Write the preset into the config."""
+        Config.PROCESSING_SCALE = self.processing_scale
+        Config.FINGERTIP_SCALE = self.fingertip_scale
+        Config.MARKER_DETECTION_INTERVAL = self.detection_interval
+
+    def __repr__(self) -> str:
+        return (
+            f"PerformancePreset({self.name}, capture={self.capture_size}, processing_scale={self.processing_scale}, "
+            f"fingertip_scale={self.fingertip_scale}, detection_interval={self.detection_interval})"
+        )
+
+
+# Ordered from cheapest to most expensive
+PRESETS: Dict[str, PerformancePreset] = {
+    "low": PerformancePreset("low", (320, 240), 0.8, 0.35, 6),
+    "medium": PerformancePreset("medium", (640, 480), 0.6, 0.5, 4),
+    "high": PerformancePreset("high", (1280, 720), 0.5, 0.75, 2),
+}
+
+
+class PerformanceBenchmark:
+    """Times the vision hot path on synthetic frames and picks the most detailed preset that fits the frame budget.
+
+    Results are cached on disk per machine and window size so later launches skip the benchmark.
+    """
+
+    CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "frucht_ninjar", "benchmark.json")
+    REPETITIONS = 5
+    # Bumped whenever the timed pipeline changes, older cached presets are measured again
+    VERSION = 2
+
+    def __init__(self, cache_path: Optional[str] = None):
+        self.cache_path = cache_path or self.CACHE_PATH
+        self.detector = aruco.ArucoDetector(
+            aruco.getPredefinedDictionary(aruco.DICT_6X6_250), DetectorProfile.create_parameters(Config.DETECTOR_PROFILE)
+        )
+
+    def select_preset(self, rebenchmark: bool = False) -> PerformancePreset:
+        """Get the cached preset for this machine or run the benchmark."""
+        cache = self._load_cache()
+        key = self._cache_key()
+        if not rebenchmark and cache.get(key, {}).get("preset") in PRESETS:
+            return PRESETS[cache[key]["preset"]]
+
+        print("Running performance benchmark...")
+        preset, timings = self.run()
+        cache[key] = {"preset": preset.name, "timings": timings}
+        self._save_cache(cache)
+        return preset
+
+    def run(self) -> Tuple[PerformancePreset, Dict[str, float]]:
+        """Benchmark presets from cheapest to most expensive, stop at the first one that exceeds the budget."""
+        budget = 1 / Config.BENCHMARK_TARGET_FPS
+        selected = next(iter(PRESETS.values()))
+        timings: Dict[str, float] = {}
+        for preset in PRESETS.values():
+            frame_time = self._time_preset(preset)
+            timings[preset.name] = frame_time
+            print(f"  {preset.name}: {frame_time * 1000:.1f} ms per frame")
+            if frame_time > budget:
+                break
+            selected = preset
+        return selected, timings
+
+    def _time_preset(self, preset: PerformancePreset) -> float:
+        """Median time of one processing step at the preset's resolutions, with the board and fingertip paths the game uses."""
+        capture_width, capture_height = preset.capture_size
+        frame = self._synthetic_frame(capture_width, capture_height)
+        resolution_plan = ResolutionPlan(
+            capture_size=preset.capture_size,
+            display_size=(Config.WINDOW_WIDTH, Config.WINDOW_HEIGHT),
+            marker_scale=preset.processing_scale,
+            fingertip_scale=preset.fingertip_scale,
+        )
+        display_width, display_height = resolution_plan.display_size
+        fingertip_width, fingertip_height = resolution_plan.fingertip_size
+        board_quad = np.array(
+            [[0.1, 0.1], [0.9, 0.1], [0.9, 0.9], [0.1, 0.9]], dtype=np.float32
+        ) * np.array([capture_width, capture_height], dtype=np.float32)
+
+        # Same stages as `BoardSession.process`, transformers keep their remap tables while the board is static
+        pyramid = GrayPyramid()
+        board_transformer = PerspectiveTransformer(flip=True)
+        fingertip_transformer = PerspectiveTransformer(flip=True)
+        board = np.empty((display_height, display_width, 3), dtype=np.uint8)
+        fingertip_frame = np.empty((fingertip_height, fingertip_width), dtype=np.uint8)
+        object_detection = ObjectDetection(resolution_plan)
+        # Time the full detection, as on frames with a hand over the board
+        object_detection.motion_gate = None
+        pyramid.reset(frame)
+        previous_small = cv2.resize(
+            np.roll(pyramid.base(), 2, axis=1), resolution_plan.marker_size, interpolation=cv2.INTER_AREA
+        )
+
+        samples = []
+        for _ in range(self.REPETITIONS):
+            start = time.perf_counter()
+            pyramid.reset(frame)
+            small = pyramid.at_size(resolution_plan.marker_size)
+            detection_start = time.perf_counter()
+            corners, _, _ = self.detector.detectMarkers(small)
+            detection_time = time.perf_counter() - detection_start
+            flow_time = self._time_optical_flow(previous_small, small, corners)
+            if Config.GPU_BOARD_WARP:
+                # The shader draws the board, only its homography is needed
+                board_matrix = board_transformer.update(board_quad, resolution_plan.display_size)
+            else:
+                board_transformer.warp(frame, board_quad, board)
+                board_matrix = board_transformer.matrix
+            if Config.CAMERA_SPACE_FINGERTIP:
+                object_detection.detect_object_in_camera(
+                    pyramid.at_size(resolution_plan.fingertip_camera_size), board_matrix
+                )
+            else:
+                fingertip_transformer.warp(pyramid.base(), board_quad, fingertip_frame)
+                object_detection.detect_object(fingertip_frame)
+            total = time.perf_counter() - start
+            # Marker detection only runs every n-th frame, corners are tracked with optical flow in between
+            interval = preset.detection_interval
+            samples.append(total - detection_time + (detection_time + (interval - 1) * flow_time) / interval)
+        return float(np.median(samples))
+
+    @staticmethod
+    def _time_optical_flow(previous: np.ndarray, current: np.ndarray, corners) -> float:
+        """Time the forward-backward corner tracking step used between marker detections."""
+        if not corners:
+            return 0.0
+        points = np.concatenate([marker.reshape(-1, 2) for marker in corners]).reshape(-1, 1, 2).astype(np.float32)
+        start = time.perf_counter()
+        tracked, _, _ = cv2.calcOpticalFlowPyrLK(previous, current, points, None, winSize=(21, 21), maxLevel=3)
+        cv2.calcOpticalFlowPyrLK(current, previous, tracked, None, winSize=(21, 21), maxLevel=3)
+        return time.perf_counter() - start
+
+    @staticmethod
+    def _synthetic_frame(width: int, height: int) -> np.ndarray:
+        """Camera-like frame with the four board markers, a hand-like blob and sensor noise."""
+        dictionary = aruco.getPredefinedDictionary(aruco.DICT_6X6_250)
+        frame = np.full((height, width, 3), 200, dtype=np.uint8)
+        marker_size = min(width, height) // 5
+        margin = marker_size // 2
+        positions = [
+            (margin, margin),
+            (width - margin - marker_size, margin),
+            (width - margin - marker_size, height - margin - marker_size),
+            (margin, height - margin - marker_size),
+        ]
+        for marker_id, (x, y) in enumerate(positions):
+            marker = aruco.generateImageMarker(dictionary, marker_id, marker_size)
+            frame[y : y + marker_size, x : x + marker_size] = marker[:, :, None]
+        cv2.ellipse(frame, (width // 2, height), (width // 10, height // 2), 0, 180, 360, (10, 10, 10), -1)
+        noise = np.random.default_rng(0).integers(0, 20, frame.shape, dtype=np.uint8)
+        return cv2.add(frame, noise)
+
+    @staticmethod
+    def _cache_key() -> str:
+        return "|".join(
+            [
+                f"v{PerformanceBenchmark.VERSION}",
+                platform.node(),
+                platform.machine(),
+                platform.processor(),
+                str(os.cpu_count()),
+                cv2.__version__,
+                Config.DETECTOR_PROFILE,
+                f"{Config.WINDOW_WIDTH}x{Config.WINDOW_HEIGHT}",
+                "gpu-warp" if Config.GPU_BOARD_WARP else "cpu-warp",
+                "camera-fingertips" if Config.CAMERA_SPACE_FINGERTIP else "warped-fingertips",
+            ]
+        )
+
+    def _load_cache(self) -> dict:
+        try:
+            with open(self.cache_path, "r") as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_cache(self, cache: dict):
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(self.cache_path, "w") as file:
+                json.dump(cache, file, indent=2)
+        except OSError as error:
+            print(f"Could not cache benchmark results: {error}")
@@ -32,25 +32,106 @@ def _order_points(points: List[Tuple[int, int]]) -> Optional[np.ndarray]:
     return np.array([top_left, top_right, bottom_right, bottom_left], dtype="float32")
 
 
+def _destination_points(width: int, height: int, flip: bool) -> np.ndarray:
+    """Output corners matching the order of `_order_points`, mirrored horizontally if `flip` is set."""
+    dst_pts = np.array(
+        [
+            [0, 0],
+            [width - 1, 0],
+            [width - 1, height - 1],
+            [0, height - 1],
+        ],
+        dtype=np.float32,
+    )
+    if flip:
+        dst_pts[:, 0] = width - 1 - dst_pts[:, 0]
+    return dst_pts
+
+
 class PerspectiveTransformer:
+    """Warps board quads into a fixed output size.
+
+    `transform` is stateless. An instance keeps the current homography (with the optional horizontal mirror
+    folded in) and reuses it while the quad moves less than `tolerance` pixels. Once the quad stayed static for
+    a frame the warp is baked into fixed-point remap tables, which makes every further frame a plain resample.
+    """
+
+    def __init__(self, *, flip: bool = False, tolerance: Optional[float] = None):
+        self.flip = flip
+        self.tolerance = Config.WARP_REUSE_TOLERANCE if tolerance is None else tolerance
+        self.matrix: Optional[np.ndarray] = None
+        self._points: Optional[np.ndarray] = None
+        self._size: Optional[Tuple[int, int]] = None
+        self._remap_tables: Optional[Tuple[np.ndarray, np.ndarray]] = None
+        self._pixel_grid: Optional[np.ndarray] = None
+
+    def update(self, points: np.ndarray, size: Tuple[int, int]) -> Optional[np.ndarray]:
+        """Homography from the quad `points` to an output of `size`, recomputed only if the quad moved.
+
+        Returns None if the points do not form a valid quad.
+        """
+        points = np.asarray(points, dtype=np.float32)
+        if len(points) != 4:
+            return None
+        if self._points is not None and self._size == size and np.abs(points - self._points).max() <= self.tolerance:
+            return self.matrix
+
+        ordered_points = _order_points(points)
+        if ordered_points is None:
+            return None
+        self.matrix = cv2.getPerspectiveTransform(ordered_points, _destination_points(*size, self.flip))
+        self._points = points
+        self._size = size
+        self._remap_tables = None
+        return self.matrix
+
+    def warp(self, frame: np.ndarray, points: np.ndarray, dst: np.ndarray) -> Optional[np.ndarray]:
+        """Warp the quad `points` of `frame` into `dst`, reusing the cached homography while the quad is static."""
+        if frame is None:
+            return None
+        height, width = dst.shape[:2]
+        previous_matrix = self.matrix
+        if self.update(points, (width, height)) is None:
+            return None
+        if self.matrix is not previous_matrix:
+            # The quad is moving, building remap tables would not pay off
+            return cv2.warpPerspective(frame, self.matrix, (width, height), dst=dst)
+
+        if self._remap_tables is None:
+            self._remap_tables = self._build_remap_tables(width, height)
+        return cv2.remap(frame, *self._remap_tables, cv2.INTER_LINEAR, dst=dst)
+
+    def _build_remap_tables(self, width: int, height: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Source coordinates of every output pixel for the current homography, in OpenCV's fixed-point format."""
+        if self._pixel_grid is None or self._pixel_grid.shape[:2] != (height, width):
+            self._pixel_grid = np.indices((height, width), dtype=np.float32)[::-1].transpose(1, 2, 0).reshape(-1, 1, 2)
+        source = cv2.perspectiveTransform(self._pixel_grid, np.linalg.inv(self.matrix))
+        return cv2.convertMaps(source.reshape(height, width, 2), None, cv2.CV_16SC2)
+
     @staticmethod
-    def transform(frame: np.ndarray, points: List[Tuple[int, int]]) -> Optional[np.ndarray]:
-        """Transform the perspective of the frame based on selected points"""
+    def transform(
+        frame: np.ndarray,
+        points: List[Tuple[int, int]],
+        size: Optional[Tuple[int, int]] = None,
+        *,
+        dst: Optional[np.ndarray] = None,
+        flip: bool = False,
+    ) -> Optional[np.ndarray]:
+        """Transform the perspective of the frame based on selected points into an image of the given size (Defaults to window size).
+
+        If `dst` is given the result is written into it and its shape defines the size.
+        If `flip` is set the result is mirrored horizontally as part of the same warp.
+        """
         if len(points) != 4 or frame is None:
             return None
+        if dst is not None:
+            height, width = dst.shape[:2]
+        else:
+            width, height = size or (Config.WINDOW_WIDTH, Config.WINDOW_HEIGHT)
 
         # Order the points for consistent transformation
         ordered_points = _order_points(points)
         if ordered_points is None:
             return None
-        dst_pts = np.array(
-            [
-                [0, 0],
-                [Config.WINDOW_WIDTH - 1, 0],
-                [Config.WINDOW_WIDTH - 1, Config.WINDOW_HEIGHT - 1],
-                [0, Config.WINDOW_HEIGHT - 1],
-            ],
-            dtype=np.float32,
-        )
-        matrix = cv2.getPerspectiveTransform(ordered_points, dst_pts)
-        return cv2.warpPerspective(frame, matrix, (Config.WINDOW_WIDTH, Config.WINDOW_HEIGHT))
+        matrix = cv2.getPerspectiveTransform(ordered_points, _destination_points(width, height, flip))
+        return cv2.warpPerspective(frame, matrix, (width, height), dst=dst)
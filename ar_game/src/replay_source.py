@@ -0,0 +1,102 @@
+import os
+import time
+from typing import List, Optional
+import cv2
+import numpy as np
+from src.frame_source import FrameSource
+
+
+class ReplayMode:
+    PACED = "paced"
+    FAST = "fast"
+
+
+class ReplaySource(FrameSource):
+    IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp")
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = ReplayMode.PACED,
+        *,
+        fps: float = 30.0,
+        loop: bool = False,
+        threaded: bool = False,
+    ):
+        """Replay a recorded video file or a directory of images as a drop-in for the camera.
+
+        In paced mode frames are delivered at the recorded frame rate (`fps` for image directories) and
+        may be dropped like a live camera would. In fast mode frames are delivered as fast as they are
+        consumed and none are dropped.
+        """
+        super().__init__(drop_frames=mode == ReplayMode.PACED)
+        self.path = path
+        self.mode = mode
+        self.loop = loop
+        self.cap: Optional[cv2.VideoCapture] = None
+        self.image_paths: List[str] = []
+        self._image_index = 0
+
+        if os.path.isdir(path):
+            self.image_paths = sorted(
+                os.path.join(path, name)
+                for name in os.listdir(path)
+                if name.lower().endswith(self.IMAGE_EXTENSIONS)
+            )
+            if not self.image_paths:
+                raise ValueError(f"No images found in {path}")
+            self.fps = fps
+            first_image = cv2.imread(self.image_paths[0])
+            self.height, self.width = first_image.shape[:2]
+        else:
+            self.cap = cv2.VideoCapture(path)
+            if not self.cap.isOpened():
+                raise ValueError(f"Could not open video file {path}")
+            self.fps = self.cap.get(cv2.CAP_PROP_FPS) or fps
+            self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+            self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+        self._frame_index = 0
+        self._start_time: Optional[float] = None
+
+        if threaded:
+            self.start()
+
+    def _read_image(self, dst: np.ndarray) -> Optional[np.ndarray]:
+        image = self._read_next(dst)
+        if image is None and self.loop:
+            self._rewind()
+            image = self._read_next(dst)
+        if image is None:
+            self.finished = True
+            return None
+
+        if self.mode == ReplayMode.PACED:
+            # Hold the frame back until its recorded presentation time
+            if self._start_time is None:
+                self._start_time = time.monotonic()
+            delay = self._start_time + self._frame_index / self.fps - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        self._frame_index += 1
+        return image
+
+    def _read_next(self, dst: np.ndarray) -> Optional[np.ndarray]:
+        if self.cap is not None:
+            success, frame = self.cap.read(image=dst)
+            return frame if success else None
+
+        if self._image_index >= len(self.image_paths):
+            return None
+        image = cv2.imread(self.image_paths[self._image_index])
+        self._image_index += 1
+        return image
+
+    def _rewind(self):
+        if self.cap is not None:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        self._image_index = 0
+
+    def _release_device(self):
+        if self.cap is not None:
+            self.cap.release()
@@ -0,0 +1,78 @@
+from typing import Optional, Tuple
+import numpy as np
+from src.config import Config
+
+
+class ResolutionPlan:
+    """Resolutions of every vision pipeline stage.
+
+    Each consumer is derived directly from the capture resolution so a pixel is resampled
+    at most once on its way to marker detection, fingertip detection or the display.
+    """
+
+    def __init__(
+        self,
+        capture_size: Tuple[int, int],
+        display_size: Tuple[int, int],
+        marker_scale: float,
+        fingertip_scale: float,
+    ):
+        self.capture_size = capture_size
+        self.display_size = display_size
+        self.marker_scale = marker_scale
+        self.fingertip_scale = fingertip_scale
+
+    @staticmethod
+    def from_config(capture_size: Optional[Tuple[int, int]] = None) -> "ResolutionPlan":
+        """Build a plan from the current config values."""
+        display_size = (Config.WINDOW_WIDTH, Config.WINDOW_HEIGHT)
+        return ResolutionPlan(
+            capture_size=capture_size or display_size,
+            display_size=display_size,
+            marker_scale=Config.PROCESSING_SCALE,
+            fingertip_scale=Config.FINGERTIP_SCALE,
+        )
+
+    def set_capture_size(self, width: int, height: int):
+        """Update the capture size to the resolution the camera actually negotiated."""
+        self.capture_size = (width, height)
+
+    @property
+    def marker_size(self) -> Tuple[int, int]:
+        """Resolution of the camera frame used for marker detection (scaled capture)."""
+        return _scale_size(self.capture_size, self.marker_scale)
+
+    @property
+    def fingertip_size(self) -> Tuple[int, int]:
+        """Resolution of the warped board used for fingertip detection (scaled display)."""
+        return _scale_size(self.display_size, self.fingertip_scale)
+
+    @property
+    def fingertip_camera_size(self) -> Tuple[int, int]:
+        """Resolution of the camera frame used for fingertip detection in camera space (scaled capture)."""
+        return _scale_size(self.capture_size, self.fingertip_scale)
+
+    def marker_to_capture(self, points: np.ndarray, marker_size: Optional[Tuple[int, int]] = None) -> np.ndarray:
+        """Map points detected at marker resolution (or the given size) back into capture coordinates."""
+        return points * _size_ratio(self.capture_size, marker_size or self.marker_size)
+
+    def fingertip_to_display(self, point: Optional[Tuple[float, float]]) -> Optional[Tuple[float, float]]:
+        """Map a point detected at fingertip resolution into display coordinates."""
+        if point is None:
+            return None
+        ratio = _size_ratio(self.display_size, self.fingertip_size)
+        return (float(point[0] * ratio[0]), float(point[1] * ratio[1]))
+
+    def __repr__(self) -> str:
+        return (
+            f"ResolutionPlan(capture={self.capture_size}, marker={self.marker_size}, "
+            f"fingertip={self.fingertip_size}, display={self.display_size})"
+        )
+
+
+def _scale_size(size: Tuple[int, int], scale: float) -> Tuple[int, int]:
+    return (max(1, int(size[0] * scale)), max(1, int(size[1] * scale)))
+
+
+def _size_ratio(target: Tuple[int, int], source: Tuple[int, int]) -> np.ndarray:
+    return np.array([target[0] / source[0], target[1] / source[1]], dtype=np.float32)
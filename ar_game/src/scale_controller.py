@@ -0,0 +1,59 @@
+import time
+from collections import deque
+from typing import Deque, Dict, Tuple
+import numpy as np
+from src.config import Config
+
+
+class ProcessingScaleController:
+    """Feedback loop for the marker detection downscale.
+
+    Shrinks the detection resolution while the smallest board marker stays above a decodable size and raises it
+    again when detections start failing. Every change is recorded in `decisions` (timestamp, old, new, reason).
+    """
+
+    STEP = 0.05
+    FAILURES_BEFORE_INCREASE = 3
+
+    def __init__(self, scale: float):
+        self.scale = self._quantize(scale)
+        self.decisions: Deque[Tuple[float, float, float, str]] = deque(maxlen=50)
+        self.last_marker_side: float = 0.0
+        self._consecutive_failures = 0
+
+    def update(self, detected_markers: Dict[int, np.ndarray], frame_scale: float, expected_markers: int) -> float:
+        """Feed the result of a full detection at `frame_scale` and return the scale for the next detection."""
+        if len(detected_markers) < min(3, expected_markers):
+            self._consecutive_failures += 1
+            if self._consecutive_failures >= self.FAILURES_BEFORE_INCREASE:
+                self._consecutive_failures = 0
+                self._set_scale(self.scale * 1.25, "detections failing")
+            return self.scale
+        self._consecutive_failures = 0
+
+        # Shortest marker edge in detection pixels
+        corners = np.array(list(detected_markers.values()))
+        edges = np.linalg.norm(corners - np.roll(corners, 1, axis=1), axis=2)
+        self.last_marker_side = float(edges.min())
+
+        # Scale at which the smallest marker would be exactly the minimum decodable size
+        desired_scale = Config.MIN_MARKER_SIDE * frame_scale / max(self.last_marker_side, 1e-3)
+        if desired_scale > self.scale:
+            self._set_scale(desired_scale, f"marker side {self.last_marker_side:.0f}px too small")
+        elif desired_scale < self.scale * 0.8:
+            # Shrink one step at a time, the hysteresis keeps the resolution from flickering
+            self._set_scale(max(desired_scale, self.scale - self.STEP), f"marker side {self.last_marker_side:.0f}px")
+        return self.scale
+
+    def _set_scale(self, scale: float, reason: str):
+        scale = self._quantize(min(Config.MAX_PROCESSING_SCALE, max(Config.MIN_PROCESSING_SCALE, scale)))
+        if scale == self.scale:
+            return
+        self.decisions.append((time.monotonic(), self.scale, scale, reason))
+        if Config.DEBUG:
+            print(f"Processing scale {self.scale:.2f} -> {scale:.2f} ({reason})")
+        self.scale = scale
+
+    def _quantize(self, scale: float) -> float:
+        """Round up to the step size so the detection resolution only takes a few distinct values."""
+        return round(float(np.ceil(scale / self.STEP - 1e-6) * self.STEP), 2)
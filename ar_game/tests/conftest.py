@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The game modules are imported as `src.*` from the ar_game directory
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,54 @@
+import numpy as np
+from src.background_model import BackgroundModel
+from src.config import Config
+from src.resolution_plan import ResolutionPlan
+
+BOUNDS = (0, 0, 320, 240)
+
+
+def _learned_model():
+    """Model learned from a flat gray board that fills a 320x240 frame."""
+    model = BackgroundModel(ResolutionPlan.from_config((640, 480)))
+    frame = np.full((240, 320), 180, dtype=np.uint8)
+    for _ in range(Config.BACKGROUND_LEARNING_FRAMES):
+        model.update(frame, _frame_to_display(0.0), learning=True, threshold=Config.CONTOUR_SENSITIVITY)
+    return model
+
+
+def _frame_to_display(shift: float) -> np.ndarray:
+    """Board homography of the 320x240 frame, moved by `shift` frame pixels."""
+    display_width, display_height = Config.WINDOW_WIDTH, Config.WINDOW_HEIGHT
+    scale = np.diag([display_width / 320, display_height / 240, 1])
+    return scale @ np.array([[1, 0, -shift], [0, 1, 0], [0, 0, 1]], dtype=np.float64)
+
+
+def test_aligned_reference_is_kept_while_the_board_jitters():
+    model = _learned_model()
+    aligned = model.aligned_reference(_frame_to_display(0.0), BOUNDS)
+    assert aligned is not None
+    assert model.aligned_reference(_frame_to_display(0.2 * Config.WARP_REUSE_TOLERANCE), BOUNDS) is aligned
+
+
+def test_aligned_reference_follows_the_board():
+    model = _learned_model()
+    aligned = model.aligned_reference(_frame_to_display(0.0), BOUNDS)
+    assert model.aligned_reference(_frame_to_display(4 * Config.WARP_REUSE_TOLERANCE), BOUNDS) is not aligned
+    assert model.aligned_reference(_frame_to_display(0.0), (0, 0, 160, 120)).shape == (120, 160)
+
+
+def test_reset_forgets_the_reference():
+    model = _learned_model()
+    model.reset()
+    assert not model.ready
+    assert model.aligned_reference(_frame_to_display(0.0), BOUNDS) is None
+
+
+def test_update_excludes_the_hand_with_the_given_threshold():
+    # A faint hand, 25 levels darker than the board, below the default background threshold
+    frame = np.full((240, 320), 180, dtype=np.uint8)
+    frame[:, :100] = 155
+    for threshold, hand_learned in ((15, False), (Config.BACKGROUND_THRESHOLD, True)):
+        model = _learned_model()
+        for _ in range(Config.BACKGROUND_UPDATE_INTERVAL):
+            model.update(frame, _frame_to_display(0.0), learning=False, threshold=threshold)
+        assert (model.reference[:, :5] < 180).all() == hand_learned
@@ -0,0 +1,45 @@
+import numpy as np
+import pytest
+from src.config import Config
+from src.corner_filter import CornerKalmanFilter
+
+SPEED = 200.0
+
+
+def _track(rate: float, updates: int = 40):
+    """Feed a corner moving at SPEED px/s at `rate` Hz, return the filter, the last time and the restart count."""
+    corner_filter = CornerKalmanFilter(1)
+    restarts = 0
+    current_time = 0.0
+    for step in range(updates):
+        current_time = step / rate
+        if not corner_filter.age(current_time)[0] <= corner_filter.restart_age:
+            restarts += 1
+        corner_filter.update(np.array([0]), np.array([[SPEED * current_time, 0.0]]), current_time)
+    return corner_filter, current_time, restarts
+
+
+@pytest.mark.parametrize("rate", [5, 30])
+def test_velocity_converges(rate):
+    corner_filter, current_time, restarts = _track(rate)
+    assert restarts == 1
+    assert corner_filter.velocities[0, 0] == pytest.approx(SPEED, rel=0.05)
+    assert corner_filter.confident(current_time)[0]
+
+
+@pytest.mark.parametrize("rate", [5, 30])
+def test_lost_marker_is_held_for_restart_age(rate):
+    corner_filter, current_time, _ = _track(rate)
+    assert corner_filter.confident(current_time + 0.9 * Config.MARKER_FILTER_RESTART_AGE)[0]
+    assert not corner_filter.confident(current_time + 1.1 * Config.MARKER_FILTER_RESTART_AGE)[0]
+    # The prediction keeps moving with the estimated velocity
+    predicted = corner_filter.predict(current_time + 0.5)[0, 0]
+    assert predicted == pytest.approx(SPEED * (current_time + 0.5), abs=5)
+
+
+def test_restarts_after_restart_age():
+    corner_filter, current_time, _ = _track(5)
+    later = current_time + 2 * Config.MARKER_FILTER_RESTART_AGE
+    corner_filter.update(np.array([0]), np.array([[0.0, 0.0]]), later)
+    assert corner_filter.positions[0].tolist() == [0.0, 0.0]
+    assert corner_filter.velocities[0].tolist() == [0.0, 0.0]
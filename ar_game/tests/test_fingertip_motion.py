@@ -0,0 +1,55 @@
+import pytest
+from src.config import Config
+from src.fingertip_motion import FingertipMotion
+from src.fingertip_tracker import Fingertip
+
+
+def _moving(speed: float = 100.0) -> FingertipMotion:
+    """Two results 0.1 s apart of a fingertip moving right at `speed` px/s, the second one arrives at 0.15 s."""
+    motion = FingertipMotion()
+    motion.update([Fingertip((0, 0), (0, 100), track_id=3)], 0.0, 0.05)
+    motion.update([Fingertip((speed * 0.1, 0), (speed * 0.1, 100), track_id=3)], 0.1, 0.15)
+    return motion
+
+
+def test_single_result_is_not_moved():
+    motion = FingertipMotion()
+    motion.update([Fingertip((5, 6), (7, 8), track_id=1)], 0.0, 0.05)
+    (fingertip,) = motion.sample(1.0)
+    assert (fingertip.high, fingertip.low, fingertip.track_id) == ((5, 6), (7, 8), 1)
+
+
+def test_prediction_extrapolates_with_smoothed_velocity():
+    motion = _moving()
+    velocity = Config.FINGERTIP_VELOCITY_SMOOTHING * 100.0
+    # Once the blend to the new result is over (0.1 s after its arrival), the fingertip moves on with the velocity
+    (fingertip,) = motion.sample(0.28)
+    expected = 10 + velocity * min(0.28 - 0.1, Config.FINGERTIP_MAX_EXTRAPOLATION)
+    assert fingertip.high == pytest.approx((expected, 0))
+    assert fingertip.low == pytest.approx((expected, 100))
+    # The prediction stops after the maximum extrapolation
+    (fingertip,) = motion.sample(10.0)
+    assert fingertip.high[0] == pytest.approx(10 + velocity * Config.FINGERTIP_MAX_EXTRAPOLATION)
+
+
+def test_new_result_is_blended_in():
+    motion = _moving()
+    # At arrival the sword is still on the previous trajectory, so it does not jump
+    (fingertip,) = motion.sample(0.15)
+    assert fingertip.high[0] == pytest.approx(0)
+    (fingertip,) = motion.sample(0.2)
+    assert 0 < fingertip.high[0] < 10 + Config.FINGERTIP_VELOCITY_SMOOTHING * 100.0 * 0.1
+
+
+def test_speed_is_limited():
+    speed = 10 * Config.FINGERTIP_MAX_SPEED
+    motion = _moving(speed)
+    (fingertip,) = motion.sample(10.0)
+    step = fingertip.high[0] - speed * 0.1
+    assert step == pytest.approx(Config.FINGERTIP_MAX_SPEED * Config.FINGERTIP_MAX_EXTRAPOLATION)
+
+
+def test_missing_tracks_are_dropped():
+    motion = _moving()
+    motion.update([Fingertip((50, 50), (50, 150), track_id=4), Fingertip((0, 0), None, track_id=5)], 0.2, 0.25)
+    assert [fingertip.track_id for fingertip in motion.sample(0.3)] == [4]
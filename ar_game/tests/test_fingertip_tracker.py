@@ -0,0 +1,38 @@
+from src.config import Config
+from src.fingertip_tracker import Fingertip, FingertipTracker
+
+
+def _ids(tracker: FingertipTracker, *positions) -> list:
+    return [fingertip.track_id for fingertip in tracker.update([Fingertip(position, None) for position in positions])]
+
+
+def test_new_fingertips_get_new_ids():
+    tracker = FingertipTracker()
+    assert _ids(tracker, (0, 0), (500, 0)) == [0, 1]
+    far = Config.FINGERTIP_MATCH_DISTANCE + 1
+    assert _ids(tracker, (0, far), (500, 0)) == [2, 1]
+
+
+def test_closest_pairs_are_matched_first():
+    tracker = FingertipTracker()
+    _ids(tracker, (0, 0), (100, 0))
+    # (60, 0) is closer to track 1, but (130, 0) is closer still and takes it
+    assert _ids(tracker, (60, 0), (130, 0)) == [0, 1]
+
+
+def test_track_survives_missed_frames():
+    tracker = FingertipTracker()
+    _ids(tracker, (0, 0))
+    for _ in range(Config.FINGERTIP_TRACK_MAX_MISSES):
+        _ids(tracker)
+    assert _ids(tracker, (10, 0)) == [0]
+    for _ in range(Config.FINGERTIP_TRACK_MAX_MISSES + 1):
+        _ids(tracker)
+    assert _ids(tracker, (10, 0)) == [1]
+
+
+def test_reset_forgets_the_tracks():
+    tracker = FingertipTracker()
+    _ids(tracker, (0, 0))
+    tracker.reset()
+    assert _ids(tracker, (0, 0)) == [1]
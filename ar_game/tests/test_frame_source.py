@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+from src.frame_source import FrameSource
+
+
+class _StaticSource(FrameSource):
+    """Delivers the same gray image forever."""
+
+    def __init__(self):
+        super().__init__()
+        self.width, self.height = 8, 6
+        self.released = False
+
+    def _read_image(self, dst: np.ndarray) -> np.ndarray:
+        dst[:] = 128
+        return dst
+
+    def _release_device(self):
+        self.released = True
+
+
+def test_incomplete_source_fails_at_construction():
+    class NoRelease(FrameSource):
+        def _read_image(self, dst: np.ndarray) -> np.ndarray:
+            return dst
+
+    with pytest.raises(TypeError, match="_release_device"):
+        NoRelease()
+
+
+def test_complete_source_reads_frames():
+    source = _StaticSource()
+    frame = source.get_frame()
+    assert frame.shape == (6, 8, 3)
+    assert (frame == 128).all()
+    source.release()
+    assert source.released
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+from src.config import Config
+from src.marker_detection import MarkerDetection
+
+BOARD_IDS = [10, 11, 12, 13]
+# Inner corners of the board markers, clockwise from the top left
+INNER_CORNERS = np.float32([[40, 40], [360, 40], [360, 260], [40, 260]])
+
+
+def _marker(x: float, y: float, size: float = 40) -> np.ndarray:
+    return np.float32([[x, y], [x + size, y], [x + size, y + size], [x, y + size]])
+
+
+MARKERS = {10: _marker(0, 0), 11: _marker(360, 0), 12: _marker(360, 260), 13: _marker(0, 260)}
+
+
+def test_detected_markers_are_cached_by_slot():
+    marker_detection = MarkerDetection(BOARD_IDS)
+    estimates = marker_detection._get_marker_data({12: MARKERS[12], 10: MARKERS[10]}, 1.0)
+    assert marker_detection.cached_times.tolist() == [1.0, -np.inf, 1.0, -np.inf]
+    assert marker_detection.cached_corners[2].tolist() == MARKERS[12].tolist()
+    # Two markers are not enough for a board and the other slots were never seen
+    assert len(estimates) == 0
+
+
+def test_board_from_four_markers_in_any_order():
+    marker_detection = MarkerDetection(BOARD_IDS)
+    detected = {marker_id: MARKERS[marker_id] for marker_id in (12, 10, 13, 11)}
+    inner_corners, board_center = marker_detection._assemble_board(marker_detection._get_marker_data(detected, 0.0))
+    assert inner_corners == pytest.approx(INNER_CORNERS)
+    assert board_center == pytest.approx(np.array([200, 150]))
+
+
+def test_board_from_three_markers_extrapolates_the_fourth():
+    marker_detection = MarkerDetection(BOARD_IDS)
+    detected = {marker_id: MARKERS[marker_id] for marker_id in (10, 11, 13)}
+    inner_corners, _ = marker_detection._assemble_board(marker_detection._get_marker_data(detected, 0.0))
+    assert sorted(inner_corners[:3].tolist()) == sorted(INNER_CORNERS[[0, 1, 3]].tolist())
+    assert inner_corners[3] == pytest.approx(INNER_CORNERS[2])
+
+
+def test_lost_markers_are_predicted_until_restart_age():
+    marker_detection = MarkerDetection(BOARD_IDS)
+    marker_detection._get_marker_data(MARKERS, 0.0)
+    # Two markers are covered, the cached ones complete the board
+    estimates = marker_detection._get_marker_data({10: MARKERS[10], 11: MARKERS[11]}, 0.1)
+    assert len(estimates) == 4
+    assert estimates[2] == pytest.approx(MARKERS[12], abs=1)
+    assert len(marker_detection._get_marker_data({}, 0.5 + Config.MARKER_FILTER_RESTART_AGE)) == 0
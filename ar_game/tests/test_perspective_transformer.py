@@ -0,0 +1,54 @@
+import cv2
+import numpy as np
+from src.config import Config
+from src.perspective_transformer import PerspectiveTransformer
+
+QUAD = np.float32([[40, 30], [280, 40], [270, 210], [50, 200]])
+SIZE = (160, 90)
+
+
+def _frame() -> np.ndarray:
+    """Smooth gradient, so the warps of different methods are comparable pixel by pixel."""
+    y, x = np.indices((240, 320))
+    return (x * 0.5 + y * 0.3).astype(np.uint8)
+
+
+def test_matrix_is_reused_while_the_quad_rests():
+    transformer = PerspectiveTransformer()
+    matrix = transformer.update(QUAD, SIZE)
+    assert transformer.update(QUAD + 0.5 * Config.WARP_REUSE_TOLERANCE, SIZE) is matrix
+    assert transformer.update(QUAD + 2 * Config.WARP_REUSE_TOLERANCE, SIZE) is not matrix
+    assert transformer.update(QUAD, (320, 180)) is not transformer.update(QUAD, SIZE)
+
+
+def test_invalid_quad_has_no_matrix():
+    assert PerspectiveTransformer().update(QUAD[:3], SIZE) is None
+
+
+def test_remap_tables_match_the_direct_warp():
+    frame = _frame()
+    transformer = PerspectiveTransformer()
+    dst = np.empty((SIZE[1], SIZE[0]), dtype=np.uint8)
+    expected = cv2.warpPerspective(frame, transformer.update(QUAD, SIZE), SIZE)
+
+    # The first frame of a new quad is warped directly, the tables are only built once it rests
+    transformer = PerspectiveTransformer()
+    assert transformer.warp(frame, QUAD, dst) is dst
+    assert transformer._remap_tables is None
+    np.testing.assert_array_equal(dst, expected)
+    transformer.warp(frame, QUAD, dst)
+    assert transformer._remap_tables is not None
+    assert np.abs(dst.astype(int) - expected).max() <= 1
+
+    # A moved quad drops the tables
+    transformer.warp(frame, QUAD + 5, dst)
+    assert transformer._remap_tables is None
+
+
+def test_flip_mirrors_the_board():
+    frame = _frame()
+    dst = np.empty((SIZE[1], SIZE[0]), dtype=np.uint8)
+    mirrored = np.empty_like(dst)
+    PerspectiveTransformer().warp(frame, QUAD, dst)
+    PerspectiveTransformer(flip=True).warp(frame, QUAD, mirrored)
+    assert np.abs(mirrored.astype(int) - dst[:, ::-1]).max() <= 1
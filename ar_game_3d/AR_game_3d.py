@@ -1,15 +1,18 @@
 import os
+import click
 import cv2
 import cv2.aruco as aruco
 import numpy as np
 import pyglet
 import math
+from typing import Optional
 
 from pyglet.gl import GL_DEPTH_TEST, GL_CULL_FACE, glEnable
 from pyglet.math import Mat4, Vec3
 
 from src.AR_model import Model
 from src.character import Character
+from src.detector_profile import DetectorProfile
 from src.game_manager import GameManager
 from src.utils import cv2glet, estimatePoseMarker, get_center_of_marker
 from src.config import INVERSE_MATRIX, WINDOW_WIDTH, WINDOW_HEIGHT, WINDOW_Z, CAMERA_MATRIX, DIST_COEFFS
@@ -21,10 +24,9 @@ window = pyglet.window.Window(WINDOW_WIDTH, WINDOW_HEIGHT, resizable=False, capt
 # Setup camera
 cap = cv2.VideoCapture(2)
 
-# Setup ArUco detector
+# Setup ArUco detector, built in main because the parameters depend on the selected detector profile
 aruco_dict = aruco.getPredefinedDictionary(aruco.DICT_6X6_250)
-aruco_params = aruco.DetectorParameters()
-detector = aruco.ArucoDetector(aruco_dict, aruco_params)
+detector: Optional[aruco.ArucoDetector] = None
 
 # Game manager
 game_manager = GameManager()
@@ -122,8 +124,19 @@ def on_close():
     cv2.destroyAllWindows()
 
 
-def main():
+@click.command()
+@click.option(
+    "--detector-profile",
+    default=DetectorProfile.BALANCED,
+    show_default=True,
+    type=click.Choice(DetectorProfile.NAMES),
+    help="ArUco detector parameters, fast trades robustness for speed, robust finds small or blurry markers",
+)
+def main(detector_profile: str):
     """Main function to start the AR game"""
+    global detector
+    detector = aruco.ArucoDetector(aruco_dict, DetectorProfile.create_parameters(detector_profile))
+
     # Enable OpenGL features
     glEnable(GL_DEPTH_TEST)
     glEnable(GL_CULL_FACE)
@@ -0,0 +1,46 @@
+import cv2.aruco as aruco
+
+
+class DetectorProfile:
+    """Named ArucoDetector parameter sets that trade detection robustness for speed.
+
+    fast: single adaptive threshold window, ignores small candidates, no corner refinement
+    balanced: two threshold windows, subpixel corner refinement
+    robust: OpenCV's broad threshold window sweep, accepts small markers, subpixel corner refinement
+
+    Same profiles as `ar_game/src/detector_profile.py`, the apps are shipped separately, keep both in sync.
+    """
+
+    FAST = "fast"
+    BALANCED = "balanced"
+    ROBUST = "robust"
+
+    NAMES = [FAST, BALANCED, ROBUST]
+
+    @staticmethod
+    def create_parameters(name: str) -> aruco.DetectorParameters:
+        """Create detector parameters for the given profile."""
+        parameters = aruco.DetectorParameters()
+        if name == DetectorProfile.FAST:
+            parameters.adaptiveThreshWinSizeMin = 13
+            parameters.adaptiveThreshWinSizeMax = 13
+            parameters.adaptiveThreshWinSizeStep = 10
+            parameters.minMarkerPerimeterRate = 0.08
+            parameters.polygonalApproxAccuracyRate = 0.05
+            parameters.cornerRefinementMethod = aruco.CORNER_REFINE_NONE
+        elif name == DetectorProfile.BALANCED:
+            parameters.adaptiveThreshWinSizeMin = 7
+            parameters.adaptiveThreshWinSizeMax = 23
+            parameters.adaptiveThreshWinSizeStep = 16
+            parameters.minMarkerPerimeterRate = 0.05
+            parameters.cornerRefinementMethod = aruco.CORNER_REFINE_SUBPIX
+            parameters.cornerRefinementWinSize = 3
+        elif name == DetectorProfile.ROBUST:
+            parameters.adaptiveThreshWinSizeMin = 3
+            parameters.adaptiveThreshWinSizeMax = 33
+            parameters.adaptiveThreshWinSizeStep = 5
+            parameters.minMarkerPerimeterRate = 0.02
+            parameters.cornerRefinementMethod = aruco.CORNER_REFINE_SUBPIX
+        else:
+            raise ValueError(f"Unknown detector profile {name}, expected one of {DetectorProfile.NAMES}")
+        return parameters